@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
@@ -15,14 +15,18 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 import hashlib
 import secrets
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque, Counter
 import asyncio
 import base64
 import shutil
 import json
+import re
+import time
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 
 # Import constants
-from constants import INSTITUTIONS, POSITIONS, FAQ_DATA, PROVINCES
+from constants import INSTITUTIONS, POSITIONS, FAQ_DATA, PROVINCES, DISTRICTS
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -56,11 +60,61 @@ def hash_sensitive_data(data: str) -> str:
     """Hash TC ID and registry numbers"""
     return hashlib.sha256(data.encode()).hexdigest()
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+class PasswordHasher:
+    """Runs bcrypt work on a bounded thread pool so it never blocks the event loop.
+
+    At most `workers` hashes run at once; further callers wait in line, and once
+    `max_waiting` callers are queued new requests are shed with a 503.
+    """
+    def __init__(self, workers: int, max_waiting: int):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.semaphore = asyncio.Semaphore(workers)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_waiting = 0
+    
+    async def run(self, func, *args):
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Sunucu şu anda yoğun, lütfen tekrar deneyin.")
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.semaphore.release()
+    
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_waiting=int(os.environ.get("PASSWORD_HASH_MAX_WAITING", "256")),
+)
+
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -68,23 +122,558 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_user_token(user: dict) -> str:
+    """User access token carrying the token_version claim used for revocation"""
+    return create_access_token(data={"sub": user["id"], "tv": user.get("token_version", 0)})
+
+class UserCache:
+    """Size-bounded LRU cache of user documents with a short TTL"""
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        user, expires_at, _ = entry
+        if time.monotonic() > expires_at:
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return user
+    
+    def put(self, user_id: str, user: dict):
+        now = time.monotonic()
+        self.entries[user_id] = (user, now + self.ttl_seconds, now)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def checked_ago(self, user_id: str) -> float:
+        """Seconds since the entry was loaded or its token_version last confirmed"""
+        entry = self.entries.get(user_id)
+        return time.monotonic() - entry[2] if entry else float("inf")
+    
+    def mark_checked(self, user_id: str):
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            self.entries[user_id] = (entry[0], entry[1], time.monotonic())
+    
+    def invalidate(self, user_id: str):
+        self.entries.pop(user_id, None)
+
+user_cache = UserCache(
+    max_size=int(os.environ.get("USER_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.environ.get("USER_CACHE_TTL_SECONDS", "30")),
+)
+# invalidate_user only reaches other workers through WS_BACKPLANE=mongo, so cache hits
+# older than this re-read token_version and a revoked token stops working within seconds
+USER_TOKEN_RECHECK_SECONDS = float(os.environ.get("USER_TOKEN_RECHECK_SECONDS", "5"))
+
+async def load_user(user_id: str) -> Optional[dict]:
+    user = user_cache.get(user_id)
+    if user is not None and user_cache.checked_ago(user_id) > USER_TOKEN_RECHECK_SECONDS:
+        current = await db.users.find_one({"id": user_id}, {"_id": 0, "token_version": 1})
+        if current is not None and current.get("token_version", 0) == user.get("token_version", 0):
+            user_cache.mark_checked(user_id)
+        else:
+            user_cache.invalidate(user_id)
+            user = None
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        if user is not None:
+            user_cache.put(user_id, user)
+    return user
+
+async def invalidate_user(user_id: str):
+    """Drop a user from the cache on every worker after a write to their document"""
+    user_cache.invalidate(user_id)
+    await ws_manager.publish_control("invalidate_user", {"user_id": user_id})
+
+async def get_user_for_token(payload: dict) -> dict:
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Token geçersiz")
+    user = await load_user(user_id)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı")
+    if payload.get("tv", 0) != user.get("token_version", 0):
+        raise HTTPException(status_code=401, detail="Token geçersiz")
+    return dict(user)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Token geçersiz")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if user is None:
-            raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı")
-        return user
+        return await get_user_for_token(payload)
     except JWTError:
         raise HTTPException(status_code=401, detail="Token geçersiz")
 
 def generate_otp() -> str:
     return f"{secrets.randbelow(1000000):06d}"
 
+def user_initials(user: Optional[dict]) -> str:
+    """Build the two-letter initials shown on listing cards"""
+    if not user:
+        return "??"
+    first_initial = user.get("first_name", "?")[0].upper() if user.get("first_name") else "?"
+    last_initial = user.get("last_name", "?")[0].upper() if user.get("last_name") else "?"
+    return f"{first_initial}{last_initial}"
+
+TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i", "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g",
+    "Ü": "u", "ü": "u", "Ö": "o", "ö": "o", "Ç": "c", "ç": "c",
+    "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u",
+})
+
+def fold_turkish(text: Optional[str]) -> str:
+    """Case- and diacritic-insensitive form of Turkish text ("İstanbul" -> "istanbul", "Şişli" -> "sisli")"""
+    folded = (text or "").translate(TURKISH_FOLD).lower()
+    return " ".join(re.findall(r"\w+", folded))
+
+def fold_email(email: Optional[str]) -> str:
+    """Lower-cased email for case-insensitive prefix search (stored as users.email_search)"""
+    return (email or "").strip().translate(TURKISH_FOLD).lower()
+
+def search_grams(text: str) -> List[str]:
+    """N-grams stored on documents: trigrams of each space-padded word plus its first letter"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.add(padded[:2])
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return sorted(grams)
+
+def search_query(q: str) -> dict:
+    """Mongo filter for a folded, word-wise AND search over search_text.
+
+    The multikey search_grams index narrows the candidates; the regex then checks
+    the exact substring. Words shorter than three letters match word prefixes.
+    """
+    conditions = []
+    for word in fold_turkish(q).split():
+        if len(word) < 3:
+            grams, pattern = [f" {word}"], f"(^| ){re.escape(word)}"
+        else:
+            grams, pattern = [word[i:i + 3] for i in range(len(word) - 2)], re.escape(word)
+        conditions.append({"search_grams": {"$all": grams}, "search_text": {"$regex": pattern}})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def listing_search_fields(listing: dict) -> dict:
+    """Normalized search fields kept on every listing document"""
+    search_text = fold_turkish(" ".join(filter(None, [listing.get("title"), listing.get("institution"), listing.get("role")])))
+    return {"search_text": search_text, "search_grams": search_grams(search_text)}
+
+# Listing reads never return the internal search fields
+LISTING_PROJECTION = {"_id": 0, "search_text": 0, "search_grams": 0}
+
+async def backfill_listing_search_fields() -> int:
+    """Add search fields to listings written before they existed"""
+    from pymongo import UpdateOne
+    updates = []
+    async for listing in db.listings.find({"search_text": {"$exists": False}}, {"_id": 0, "id": 1, "title": 1, "institution": 1, "role": 1}):
+        updates.append(UpdateOne({"id": listing["id"]}, {"$set": listing_search_fields(listing)}))
+    for start in range(0, len(updates), 1000):
+        await db.listings.bulk_write(updates[start:start + 1000], ordered=False)
+    return len(updates)
+
+# ============= PAGINATION =============
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: dict, sort_field: str = "created_at") -> str:
+    """Opaque cursor for the position right after doc"""
+    raw = json.dumps([doc.get(sort_field), doc["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return value, last_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+
+def clamp_limit(limit: int, max_limit: int) -> int:
+    return max(1, min(limit, max_limit))
+
+def keyset_query(query: dict, cursor: Optional[str], sort_field: str, descending: bool) -> dict:
+    """Restrict query to the documents after the cursor position"""
+    if not cursor:
+        return query
+    value, last_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    keyset = {"$or": [{sort_field: {op: value}}, {sort_field: value, "id": {op: last_id}}]}
+    return {"$and": [query, keyset]} if query else keyset
+
+async def paginate(collection, query: dict, projection: dict, limit: int, cursor: Optional[str] = None,
+                   sort_field: str = "created_at", descending: bool = True):
+    """Keyset pagination over (sort_field, id).
+
+    Every page is an index range scan starting right after the cursor, so deep pages
+    cost the same as the first one. Returns (docs, next_cursor); next_cursor is None
+    on the last page.
+    """
+    direction = -1 if descending else 1
+    query = keyset_query(query, cursor, sort_field, descending)
+    docs = await collection.find(query, projection).sort(
+        [(sort_field, direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+# ============= ADMIN QUERY ENGINE =============
+# User fields never returned by admin list endpoints, joined or not
+ADMIN_HIDDEN_USER_FIELDS = ("password_hash", "tc_hash", "registry_hash", "email_search")
+# Default and maximum page size of the admin lists; the dashboard pages on with X-Next-Cursor
+ADMIN_PAGE_SIZE = 100
+
+def parse_sort(sort: str, allowed=("created_at",)) -> tuple:
+    """"created_at" / "-created_at" -> (field, descending)"""
+    field = sort.lstrip("-")
+    if field not in allowed:
+        raise HTTPException(status_code=400, detail="Geçersiz sıralama.")
+    return field, sort.startswith("-")
+
+async def admin_list(collection, response: Response, query: dict, projection: dict, joins=(),
+                     limit: int = 100, cursor: Optional[str] = None, sort: str = "-created_at") -> List[dict]:
+    """One keyset page of an admin list with its joins resolved in the same aggregation.
+    
+    joins are (as_field, from_collection, local_field, foreign_field, hidden_fields);
+    each joined document (or None) is embedded under as_field. projection must be an
+    exclusion projection, as the join exclusions are merged into it.
+    """
+    sort_field, descending = parse_sort(sort)
+    direction = -1 if descending else 1
+    pipeline = [
+        {"$match": keyset_query(query, cursor, sort_field, descending)},
+        {"$sort": {sort_field: direction, "id": direction}},
+        {"$limit": limit + 1},
+    ]
+    hidden = dict(projection)
+    for as_field, from_collection, local_field, foreign_field, hidden_fields in joins:
+        pipeline += [
+            {"$lookup": {"from": from_collection, "localField": local_field, "foreignField": foreign_field, "as": as_field}},
+            {"$set": {as_field: {"$ifNull": [{"$arrayElemAt": ["$" + as_field, 0]}, None]}}},
+        ]
+        hidden.update({f"{as_field}.{field}": 0 for field in ("_id", *hidden_fields)})
+    pipeline.append({"$project": hidden})
+    docs = await collection.aggregate(pipeline).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    set_next_cursor(response, next_cursor)
+    return docs
+
+def profile_join(as_field: str, local_field: str = "user_id") -> tuple:
+    return (as_field, "profiles", local_field, "user_id", ())
+
+def user_join(as_field: str, local_field: str = "user_id") -> tuple:
+    return (as_field, "users", local_field, "id", ADMIN_HIDDEN_USER_FIELDS)
+
+class EnrichmentLoader:
+    """Per-request batch loader for profile, user and listing lookups.
+
+    Handlers collect every id on the page first and resolve each collection
+    with a single `$in` query instead of one `find_one` per row.
+    """
+    def __init__(self):
+        self._profiles: Dict[str, Optional[dict]] = {}
+        self._users: Dict[tuple, Dict[str, Optional[dict]]] = defaultdict(dict)
+        self._listings: Dict[str, Optional[dict]] = {}
+    
+    async def profiles(self, user_ids) -> Dict[str, Optional[dict]]:
+        """Return {user_id: profile or None}"""
+        user_ids = [uid for uid in dict.fromkeys(user_ids) if uid]
+        missing = [uid for uid in user_ids if uid not in self._profiles]
+        if missing:
+            async for profile in db.profiles.find({"user_id": {"$in": missing}}, {"_id": 0}):
+                self._profiles.setdefault(profile["user_id"], profile)
+            for uid in missing:
+                self._profiles.setdefault(uid, None)
+        return {uid: self._profiles[uid] for uid in user_ids}
+    
+    async def users(self, user_ids, projection: Optional[dict] = None) -> Dict[str, Optional[dict]]:
+        """Return {user_id: user or None} using the given projection"""
+        projection = {"_id": 0, **(projection or {})}
+        # "id" is needed to map results back, so add it to inclusion projections
+        if any(v for k, v in projection.items() if k != "_id"):
+            projection["id"] = 1
+        cache = self._users[tuple(sorted(projection.items()))]
+        user_ids = [uid for uid in dict.fromkeys(user_ids) if uid]
+        missing = [uid for uid in user_ids if uid not in cache]
+        if missing:
+            async for user in db.users.find({"id": {"$in": missing}}, projection):
+                cache.setdefault(user["id"], user)
+            for uid in missing:
+                cache.setdefault(uid, None)
+        return {uid: cache[uid] for uid in user_ids}
+    
+    async def listings(self, listing_ids) -> Dict[str, Optional[dict]]:
+        """Return {listing_id: listing or None}"""
+        listing_ids = [lid for lid in dict.fromkeys(listing_ids) if lid]
+        missing = [lid for lid in listing_ids if lid not in self._listings]
+        if missing:
+            async for listing in db.listings.find({"id": {"$in": missing}}, LISTING_PROJECTION):
+                self._listings.setdefault(listing["id"], listing)
+            for lid in missing:
+                self._listings.setdefault(lid, None)
+        return {lid: self._listings[lid] for lid in listing_ids}
+
+class GroupCommitWriter:
+    """Write-behind queue that group-commits inserts with insert_many.
+
+    Inserts are buffered per collection and flushed flush_interval after the first
+    one arrives, or as soon as a collection reaches max_batch documents. At most
+    max_pending documents may be buffered; further writers wait (backpressure).
+    In durable mode insert() returns only after its batch has been written.
+    """
+    def __init__(self, flush_interval: float, max_batch: int, max_pending: int, durable: bool):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.durable = durable
+        self.buffers: Dict[str, list] = defaultdict(list)
+        self.slots = asyncio.Semaphore(max_pending)
+        self.has_items = asyncio.Event()
+        self.batch_full = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.pending = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+    
+    async def start(self):
+        self.stopping = False
+        self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Let the running flush finish (cancelling it would lose its batch), then flush the rest"""
+        if self.task:
+            self.stopping = True
+            self.has_items.set()
+            self.batch_full.set()
+            await self.task
+            self.task = None
+        await self.flush()
+    
+    async def insert(self, collection: str, doc: dict, durable: Optional[bool] = None):
+        """Queue a copy of doc (the caller's dict never receives an _id)"""
+        if self.task is None:
+            # Not running inside the app (CLI, shutdown): write directly
+            await db[collection].insert_one(dict(doc))
+            return
+        durable = self.durable if durable is None else durable
+        await self.slots.acquire()
+        if self.task is None:
+            # Stopped (and finally flushed) while waiting for a slot
+            self.slots.release()
+            await db[collection].insert_one(dict(doc))
+            return
+        future = asyncio.get_running_loop().create_future() if durable else None
+        buffer = self.buffers[collection]
+        buffer.append((dict(doc), future))
+        self.pending += 1
+        self.has_items.set()
+        if len(buffer) >= self.max_batch:
+            self.batch_full.set()
+        if future:
+            await future
+    
+    async def _run(self):
+        while not self.stopping:
+            await self.has_items.wait()
+            try:
+                await asyncio.wait_for(self.batch_full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.has_items.clear()
+            self.batch_full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+    
+    async def flush(self):
+        from pymongo.errors import BulkWriteError
+        buffers, self.buffers = self.buffers, defaultdict(list)
+        for collection, items in buffers.items():
+            for start in range(0, len(items), self.max_batch):
+                chunk = items[start:start + self.max_batch]
+                # chunk index -> error for the documents that were not written
+                errors: Dict[int, Exception] = {}
+                try:
+                    await db[collection].insert_many([doc for doc, _ in chunk], ordered=False)
+                except BulkWriteError as e:
+                    # Unordered: every document not listed in writeErrors was inserted
+                    indexes = [error["index"] for error in e.details.get("writeErrors", [])]
+                    errors = {i: e for i in indexes or range(len(chunk))}
+                    logger.error(f"Group commit to {collection} failed for {len(errors)} of {len(chunk)} documents: {e}")
+                except Exception as e:
+                    errors = {i: e for i in range(len(chunk))}
+                    logger.error(f"Group commit to {collection} failed: {e}")
+                self.written += len(chunk) - len(errors)
+                self.failed += len(errors)
+                self.batches += 1
+                for i, (_, future) in enumerate(chunk):
+                    self.pending -= 1
+                    self.slots.release()
+                    if future and not future.done():
+                        if i in errors:
+                            future.set_exception(errors[i])
+                        else:
+                            future.set_result(None)
+    
+    def metrics(self) -> dict:
+        return {
+            "durable": self.durable,
+            "pending": self.pending,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+write_behind = GroupCommitWriter(
+    flush_interval=int(os.environ.get("WRITE_BEHIND_FLUSH_MS", "5")) / 1000,
+    max_batch=int(os.environ.get("WRITE_BEHIND_MAX_BATCH", "500")),
+    max_pending=int(os.environ.get("WRITE_BEHIND_MAX_PENDING", "10000")),
+    durable=os.environ.get("WRITE_BEHIND_DURABLE", "true").lower() == "true",
+)
+
+# Platform counter -> (collection, filter) it mirrors, used by reconciliation
+COUNTER_QUERIES = {
+    "total_users": ("users", {}),
+    "total_listings": ("listings", {}),
+    "active_listings": ("listings", {"status": "active"}),
+    "total_invitations": ("invitations", {}),
+    "accepted_invitations": ("invitations", {"status": "accepted"}),
+    "total_conversations": ("conversations", {}),
+    "total_messages": ("messages", {}),
+    "pending_deletions": ("deletion_requests", {"status": "pending"}),
+    "pending_profile_updates": ("profile_update_requests", {"status": "pending"}),
+}
+
+class CounterBuffer:
+    """Materialized platform counters in a single `counters` document.
+    
+    Write sites call add(); deltas are summed in memory and flushed with one $inc
+    every flush_interval. reconcile() recounts from the collections, correcting any
+    drift (a crash before a flush, bulk deletes), every reconcile_interval.
+    
+    Each reconcile stores the wall-clock time its count started as counted_at.
+    Deltas collected before that (on any worker) are already in the count, so
+    flush() drops them and only $incs the rest, conditional on counted_at.
+    """
+    def __init__(self, flush_interval: float, reconcile_interval: float, doc_id: str = "platform"):
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self.doc_id = doc_id
+        # (collected_at, deltas) in collection order
+        self.pending: List[tuple] = []
+        self.task: Optional[asyncio.Task] = None
+    
+    def add(self, **deltas: int):
+        self.pending.append((time.time(), deltas))
+    
+    @staticmethod
+    def totals(entries: List[tuple], counted_at: Optional[float]) -> Dict[str, int]:
+        """Sum the deltas collected at or after counted_at"""
+        totals: Dict[str, int] = defaultdict(int)
+        for collected_at, deltas in entries:
+            if counted_at is None or collected_at >= counted_at:
+                for name, delta in deltas.items():
+                    totals[name] += delta
+        return {name: delta for name, delta in totals.items() if delta}
+    
+    async def flush(self):
+        from pymongo.errors import DuplicateKeyError
+        entries, self.pending = self.pending, []
+        while entries:
+            doc = await db.counters.find_one({"_id": self.doc_id}, {"counted_at": 1}) or {}
+            counted_at = doc.get("counted_at")
+            deltas = self.totals(entries, counted_at)
+            if not deltas:
+                return
+            try:
+                await db.counters.update_one({"_id": self.doc_id, "counted_at": counted_at}, {"$inc": deltas}, upsert=True)
+                return
+            except DuplicateKeyError:
+                # A reconcile replaced the document between the read and the $inc; re-filter
+                continue
+    
+    async def reconcile(self) -> dict:
+        from pymongo.errors import DuplicateKeyError
+        await self.flush()
+        counted_at = time.time()
+        names = list(COUNTER_QUERIES)
+        counts = await asyncio.gather(*(
+            db[collection].count_documents(query) for collection, query in COUNTER_QUERIES.values()
+        ))
+        values = dict(zip(names, counts))
+        try:
+            await db.counters.update_one(
+                {"_id": self.doc_id, "$or": [{"counted_at": None}, {"counted_at": {"$lt": counted_at}}]},
+                {"$set": {**values, "counted_at": counted_at, "reconciled_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # A reconcile that started later already stored its count
+            pass
+        return values
+    
+    def schedule_reconcile(self):
+        """Recount in the background after bulk deletes whose effect is hard to track"""
+        async def run():
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Counter reconciliation failed: {e}")
+        asyncio.create_task(run())
+    
+    async def read(self) -> dict:
+        doc = await db.counters.find_one({"_id": self.doc_id})
+        if not doc or any(name not in doc for name in COUNTER_QUERIES):
+            return await self.reconcile()
+        pending = self.totals(self.pending, doc.get("counted_at"))
+        return {name: doc[name] + pending.get(name, 0) for name in COUNTER_QUERIES}
+    
+    async def start(self):
+        self.task = asyncio.create_task(self._loop())
+    
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        await self.flush()
+    
+    async def _loop(self):
+        last_reconcile = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                if time.monotonic() - last_reconcile >= self.reconcile_interval:
+                    last_reconcile = time.monotonic()
+                    await self.reconcile()
+                else:
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Counter flush failed: {e}")
+
+platform_counters = CounterBuffer(
+    flush_interval=float(os.environ.get("COUNTERS_FLUSH_SECONDS", "1")),
+    reconcile_interval=float(os.environ.get("COUNTERS_RECONCILE_SECONDS", "3600"))
+)
+
 async def create_notification(user_id: str, title: str, message: str, notification_type: str):
     notification = {
         "id": str(uuid.uuid4()),
@@ -95,7 +684,7 @@ async def create_notification(user_id: str, title: str, message: str, notificati
         "read": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.notifications.insert_one(notification)
+    await write_behind.insert("notifications", notification)
     
     # Send via WebSocket if user is connected
     await ws_manager.send_to_user(user_id, {
@@ -103,18 +692,563 @@ async def create_notification(user_id: str, title: str, message: str, notificati
         "data": notification
     })
 
+async def notify_new_message(recipient_id: str, conversation_id: str):
+    """Coalesced chat notification: at most one unread "Yeni Mesaj" per conversation and
+    recipient, bumped with a counter. Skipped while the recipient has the conversation open."""
+    if await ws_manager.is_viewing(recipient_id, conversation_id):
+        return
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
+    now = datetime.now(timezone.utc).isoformat()
+    query = {"user_id": recipient_id, "conversation_id": conversation_id, "type": "message", "read": False}
+    update = [
+        {"$set": {
+            "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+            "title": "Yeni Mesaj",
+            "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+            "created_at": now
+        }},
+        {"$set": {"message": {"$cond": [
+            {"$gt": ["$count", 1]},
+            {"$concat": ["Size ", {"$toString": "$count"}, " yeni mesaj geldi."]},
+            "Size yeni bir mesaj geldi."
+        ]}}}
+    ]
+    for attempt in range(2):
+        try:
+            notification = await db.notifications.find_one_and_update(
+                query, update, projection={"_id": 0}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            # A concurrent upsert created it first; the retry updates that document
+            if attempt:
+                raise
+    
+    await ws_manager.send_to_user(recipient_id, {
+        "type": "notification",
+        "data": notification
+    })
+
+# Conversation documents carry their inbox summary: last_message, last_activity_at
+# and unread_count {user_id: n}, kept current by the send and read paths
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+async def record_conversation_message(conversation_id: str, recipient_id: str, message: dict):
+    """Update the conversation summary for a new message in one atomic write"""
+    await db.conversations.update_one(
+        {"id": conversation_id},
+        {
+            "$set": {"last_message": {
+                "id": message["id"],
+                "content": message["content"][:LAST_MESSAGE_PREVIEW_LENGTH],
+                "sender_id": message["sender_id"],
+                "created_at": message["created_at"],
+                "read": False
+            }},
+            "$max": {"last_activity_at": message["created_at"]},
+            "$inc": {f"unread_count.{recipient_id}": 1}
+        }
+    )
+
+async def mark_conversation_read(conversation_id: str, user_id: str, last_seen_id: Optional[str] = None):
+    """Mark the messages the reader has seen (up to last_seen_id, else the current last one) as read.
+    
+    The unread counter is decremented by exactly the messages flipped here, so an $inc
+    from record_conversation_message racing with this is never lost, and last_message is
+    only flagged read if it is the message the reader saw.
+    """
+    if last_seen_id is None:
+        conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0, "last_message.id": 1})
+        last_seen_id = ((conversation or {}).get("last_message") or {}).get("id")
+    anchor = last_seen_id and await db.messages.find_one(
+        {"id": last_seen_id, "conversation_id": conversation_id}, {"_id": 0, "created_at": 1}
+    )
+    if not anchor:
+        return
+    result = await db.messages.update_many(
+        {"conversation_id": conversation_id, "sender_id": {"$ne": user_id}, "read": False,
+         "created_at": {"$lte": anchor["created_at"]}},
+        {"$set": {"read": True}}
+    )
+    if result.modified_count:
+        unread = f"unread_count.{user_id}"
+        await db.conversations.update_one({"id": conversation_id}, [{"$set": {unread: {"$max": [
+            0, {"$subtract": [{"$ifNull": ["$" + unread, 0]}, result.modified_count]}
+        ]}}}])
+    await db.conversations.update_one(
+        {"id": conversation_id, "last_message.id": last_seen_id, "last_message.sender_id": {"$ne": user_id}},
+        {"$set": {"last_message.read": True}}
+    )
+
+async def backfill_user_email_search() -> int:
+    """Add the folded email used by the admin user search to users created before it existed"""
+    from pymongo import UpdateOne
+    updates = []
+    async for user in db.users.find({"email_search": {"$exists": False}}, {"_id": 0, "id": 1, "email": 1}):
+        updates.append(UpdateOne({"id": user["id"]}, {"$set": {"email_search": fold_email(user["email"])}}))
+    for start in range(0, len(updates), 1000):
+        await db.users.bulk_write(updates[start:start + 1000], ordered=False)
+    return len(updates)
+
+async def backfill_conversation_summaries() -> int:
+    """Fill summaries of conversations created before they were maintained"""
+    from pymongo import UpdateOne
+    updates = []
+    async for conversation in db.conversations.find({"last_activity_at": {"$exists": False}}, {"_id": 0, "id": 1, "participants": 1, "created_at": 1}):
+        summary = {"last_activity_at": conversation["created_at"]}
+        last, *unread = await asyncio.gather(
+            db.messages.find({"conversation_id": conversation["id"]}, {"_id": 0}).sort(
+                [("created_at", -1), ("id", -1)]
+            ).limit(1).to_list(1),
+            *(db.messages.count_documents({
+                "conversation_id": conversation["id"], "sender_id": {"$ne": user_id}, "read": False
+            }) for user_id in conversation["participants"])
+        )
+        summary["unread_count"] = dict(zip(conversation["participants"], unread))
+        if last:
+            last = last[0]
+            summary["last_activity_at"] = last["created_at"]
+            summary["last_message"] = {
+                "id": last["id"],
+                "content": last["content"][:LAST_MESSAGE_PREVIEW_LENGTH],
+                "sender_id": last["sender_id"],
+                "created_at": last["created_at"],
+                "read": last.get("read", False)
+            }
+        # Runs alongside live traffic: never overwrite a summary a new message has started
+        updates.append(UpdateOne({"id": conversation["id"], "last_activity_at": {"$exists": False}}, {"$set": summary}))
+    for start in range(0, len(updates), 1000):
+        await db.conversations.bulk_write(updates[start:start + 1000], ordered=False)
+    return len(updates)
+
 # ============= WEBSOCKET MANAGER =============
-class ConnectionManager:
+WORKER_ID = str(uuid.uuid4())
+# "local" only fans out within one process; run more than one worker with "mongo" so
+# broadcasts and control events (e.g. invalidate_user) reach every worker
+WS_BACKPLANE = os.environ.get("WS_BACKPLANE", "local")  # "local" or "mongo"
+WS_BACKPLANE_CAPPED_SIZE = int(os.environ.get("WS_BACKPLANE_CAPPED_SIZE", str(16 * 1024 * 1024)))
+# How far before the last seen event a re-tail starts reading; must cover clock skew between hosts
+WS_BACKPLANE_RESUME_WINDOW_SECONDS = 60
+WS_PRESENCE_TTL_SECONDS = 600
+WS_PRESENCE_REFRESH_SECONDS = 60
+WS_SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT_SECONDS = float(os.environ.get("WS_SEND_TIMEOUT_SECONDS", "10"))
+WS_SLOW_CONSUMER_POLICY = os.environ.get("WS_SLOW_CONSUMER_POLICY", "disconnect")  # "disconnect" or "drop"
+# Ephemeral frames that are simply dropped when a queue is full, whatever the policy
+WS_DROPPABLE_TYPES = {"typing", "typing_stopped", "ping"}
+WS_HEARTBEAT_SECONDS = float(os.environ.get("WS_HEARTBEAT_SECONDS", "30"))
+# A socket that has sent nothing (not even a pong) for this long is reaped
+WS_IDLE_TIMEOUT_SECONDS = float(os.environ.get("WS_IDLE_TIMEOUT_SECONDS", "90"))
+WS_MAX_CONNECTIONS_PER_USER = int(os.environ.get("WS_MAX_CONNECTIONS_PER_USER", "5"))
+WS_MAX_CONNECTIONS = int(os.environ.get("WS_MAX_CONNECTIONS", "10000"))
+# Close codes and what a client should do after each
+WS_CLOSE_EVICTED = 4000  # reaped as idle or too slow to keep up: reconnect
+WS_CLOSE_UNAUTHORIZED = 4001  # missing, invalid or revoked token: do not reconnect
+WS_CLOSE_POLICY = 1008  # per-user connection cap reached: do not reconnect
+WS_CLOSE_TRY_AGAIN = 1013  # this worker is at WS_MAX_CONNECTIONS: reconnect with backoff
+# Frames numbered per user and kept for replay to reconnecting clients
+WS_REPLAYABLE_TYPES = {"new_message", "notification"}
+WS_REPLAY_BUFFER_SIZE = int(os.environ.get("WS_REPLAY_BUFFER_SIZE", "100"))
+WS_REPLAY_MAX_USERS = int(os.environ.get("WS_REPLAY_MAX_USERS", "5000"))
+
+class WebSocketSession:
+    """Per-connection state kept by ConnectionManager"""
+    def __init__(self, websocket: WebSocket, user_id: str):
+        self.id = str(uuid.uuid4())
+        self.websocket = websocket
+        self.user_id = user_id
+        # Conversation currently open on this socket, if any
+        self.conversation_id: Optional[str] = None
+        self.presence_written_at = 0.0
+        # Read-through caches, invalidated by ws_manager control events
+        self.conversations: Dict[str, List[str]] = {}
+        self.blocked_by: Dict[str, bool] = {}
+        self.profile: Optional[dict] = None
+        self.profile_loaded = False
+        # Outbound frames, drained by ConnectionManager._writer
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+        self.closing = False
+        self.last_seen = time.monotonic()
+    
+    async def conversation_participants(self, conversation_id: str) -> Optional[List[str]]:
+        """Participants of a conversation this user belongs to, else None"""
+        participants = self.conversations.get(conversation_id)
+        if participants is None:
+            conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0, "participants": 1})
+            if not conversation or self.user_id not in conversation["participants"]:
+                return None
+            participants = self.conversations[conversation_id] = conversation["participants"]
+        return participants
+    
+    async def is_blocked_by(self, other_user_id: str) -> bool:
+        if other_user_id not in self.blocked_by:
+            block = await db.blocks.find_one({"blocker_id": other_user_id, "blocked_id": self.user_id}, {"_id": 1})
+            self.blocked_by[other_user_id] = block is not None
+        return self.blocked_by[other_user_id]
+    
+    async def sender_profile(self) -> Optional[dict]:
+        if not self.profile_loaded:
+            self.profile = await db.profiles.find_one({"user_id": self.user_id}, {"_id": 0})
+            self.profile_loaded = True
+        return self.profile
+
+class ReplayBuffer:
+    """Last few sequenced frames per user (LRU over users), for resuming sockets"""
+    def __init__(self, per_user: int, max_users: int):
+        self.per_user = per_user
+        self.max_users = max_users
+        self.users: "OrderedDict[str, deque]" = OrderedDict()
+    
+    def append(self, user_id: str, seq: int, message: dict):
+        events = self.users.get(user_id)
+        if events is None:
+            events = self.users[user_id] = deque(maxlen=self.per_user)
+            if len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        else:
+            self.users.move_to_end(user_id)
+        events.append((seq, message))
+    
+    def since(self, user_id: str, last_seq: int, latest_seq: int) -> Optional[List[dict]]:
+        """Frames after last_seq in seq order, or None when the buffer does not hold all of them.
+        
+        Sequences are allocated before publishing, so frames can be appended (and evicted)
+        out of order; coverage means every seq up to latest_seq is buffered, not just the oldest.
+        """
+        events = sorted(self.users.get(user_id) or (), key=lambda event: event[0])
+        missed = [(seq, message) for seq, message in events if seq > last_seq]
+        if {seq for seq, _ in missed if seq <= latest_seq} != set(range(last_seq + 1, latest_seq + 1)):
+            return None
+        return [message for _, message in missed]
+
+class InProcessBackplane:
+    """Single-worker backplane: events go straight to this worker's sockets"""
     def __init__(self):
-        # user_id -> list of websocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
+        self.deliver = None
+        # Sequences live in memory, so they are only meaningful within this process
+        self.epoch = WORKER_ID
+        self.sequences: Dict[str, int] = defaultdict(int)
+    
+    async def start(self, deliver):
+        self.deliver = deliver
+    
+    async def stop(self):
+        pass
+    
+    async def publish(self, event: dict):
+        await self.deliver(event)
+    
+    # Single worker: ConnectionManager's local sessions are the whole picture
+    async def set_presence(self, session: WebSocketSession):
+        pass
+    
+    async def clear_presence(self, session: WebSocketSession):
+        pass
+    
+    async def is_viewing(self, user_id: str, conversation_id: str) -> bool:
+        return False
+    
+    async def next_seq(self, user_id: str) -> int:
+        self.sequences[user_id] += 1
+        return self.sequences[user_id]
+    
+    async def latest_seq(self, user_id: str) -> int:
+        return self.sequences.get(user_id, 0)
+
+class MongoBackplane:
+    """Cross-worker backplane over a capped collection.
+
+    Every worker tails `ws_events` with a tailable cursor and delivers each event to
+    its own sockets. The publishing worker delivers locally right away and skips its
+    own events on the tail, so single-worker latency is unchanged.
+    """
+    def __init__(self, collection_name: str = "ws_events", size: int = WS_BACKPLANE_CAPPED_SIZE):
+        self.collection_name = collection_name
+        self.size = size
+        self.deliver = None
+        self.task: Optional[asyncio.Task] = None
+        # Sequences are stored in ws_sequences and survive restarts
+        self.epoch = "mongo"
+    
+    @property
+    def collection(self):
+        return db[self.collection_name]
+    
+    async def start(self, deliver):
+        self.deliver = deliver
+        if self.collection_name not in await db.list_collection_names():
+            try:
+                await db.create_collection(self.collection_name, capped=True, size=self.size)
+            except Exception as e:
+                # Another worker created it first
+                logger.info(f"Backplane collection not created: {e}")
+        # Tailable cursors die on empty collections, so make sure there is one document
+        await self.collection.insert_one({"origin": WORKER_ID, "kind": "worker_started", "created_at": datetime.now(timezone.utc).isoformat()})
+        self.task = asyncio.create_task(self._tail())
+    
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+    
+    async def publish(self, event: dict):
+        await self.deliver(event)
+        await self.collection.insert_one({**event, "origin": WORKER_ID})
+    
+    # Which conversation each socket has open, shared across workers (TTL-expired)
+    async def set_presence(self, session: WebSocketSession):
+        if session.conversation_id is None:
+            await self.clear_presence(session)
+            return
+        await db.ws_presence.update_one(
+            {"_id": session.id},
+            {"$set": {
+                "user_id": session.user_id,
+                "conversation_id": session.conversation_id,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=WS_PRESENCE_TTL_SECONDS)
+            }},
+            upsert=True
+        )
+    
+    async def clear_presence(self, session: WebSocketSession):
+        await db.ws_presence.delete_one({"_id": session.id})
+    
+    async def is_viewing(self, user_id: str, conversation_id: str) -> bool:
+        return await db.ws_presence.find_one({
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "expires_at": {"$gt": datetime.now(timezone.utc)}
+        }, {"_id": 1}) is not None
+    
+    async def next_seq(self, user_id: str) -> int:
+        from pymongo import ReturnDocument
+        doc = await db.ws_sequences.find_one_and_update(
+            {"_id": user_id}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["seq"]
+    
+    async def latest_seq(self, user_id: str) -> int:
+        doc = await db.ws_sequences.find_one({"_id": user_id})
+        return doc["seq"] if doc else 0
+    
+    async def newest_id(self):
+        last = await self.collection.find({}, {"_id": 1}).sort("$natural", -1).limit(1).to_list(1)
+        return last[0]["_id"] if last else None
     
-    async def connect(self, websocket: WebSocket, user_id: str):
+    async def _tail(self):
+        """Deliver other workers' events, resuming after the last one seen when the cursor dies.
+        
+        ObjectIds minted by different workers are not in insertion order, so resuming
+        with _id > last_id could skip events. Instead the tail re-reads in natural
+        (insertion) order from shortly before last_id and skips up to last_id itself.
+        """
+        from bson import ObjectId
+        from pymongo import CursorType
+        last_id = await self.newest_id()
+        while True:
+            try:
+                if last_id is not None and not await self.collection.find_one({"_id": last_id}, {"_id": 1}):
+                    logger.warning("Backplane tail fell behind the capped collection; events were lost")
+                    last_id = await self.newest_id()
+                query, skipping = {}, last_id is not None
+                if skipping:
+                    window_start = last_id.generation_time - timedelta(seconds=WS_BACKPLANE_RESUME_WINDOW_SECONDS)
+                    query = {"_id": {"$gte": ObjectId.from_datetime(window_start)}}
+                cursor = self.collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for doc in cursor:
+                        if skipping:
+                            skipping = doc["_id"] != last_id
+                            continue
+                        last_id = doc["_id"]
+                        if doc.get("origin") == WORKER_ID or ("message" not in doc and "control" not in doc):
+                            continue
+                        doc.pop("_id", None)
+                        await self.deliver(doc)
+                await asyncio.sleep(0.5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Backplane tail error: {e}")
+                await asyncio.sleep(1)
+
+class ConnectionManager:
+    def __init__(self, backplane=None):
+        # user_id -> list of websocket connections (this worker only)
+        self.active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
+        self.sessions: Dict[WebSocket, WebSocketSession] = {}
+        self.backplane = backplane or InProcessBackplane()
+        # control event name -> handler, for cross-worker cache invalidation
+        self.control_handlers: Dict[str, Any] = {}
+        self.sent = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.peak_queue_depth = 0
+        self.reaped = 0
+        self.rejected = 0
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.replay = ReplayBuffer(WS_REPLAY_BUFFER_SIZE, WS_REPLAY_MAX_USERS)
+        self.replayed = 0
+        self.resyncs = 0
+    
+    async def start(self):
+        await self.backplane.start(self.deliver_local)
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+    
+    async def stop(self):
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+        await self.backplane.stop()
+    
+    async def _heartbeat(self):
+        """Ping every socket and reap the ones that stopped answering"""
+        while True:
+            await asyncio.sleep(WS_HEARTBEAT_SECONDS)
+            cutoff = time.monotonic() - WS_IDLE_TIMEOUT_SECONDS
+            for session in list(self.sessions.values()):
+                if session.last_seen < cutoff:
+                    self.reaped += 1
+                    self.evict(session, "idle")
+                else:
+                    self.enqueue(session, {"type": "ping"})
+    
+    async def connect(self, websocket: WebSocket, user_id: str, last_seq: Optional[int] = None,
+                      epoch: Optional[str] = None) -> Optional[WebSocketSession]:
+        """Accept a socket, or refuse it (returning None) when this worker or the user is at capacity.
+        
+        Existing sockets are never evicted to make room: a refused client would
+        otherwise reconnect and evict the next one. Dead sockets free their slot
+        when the heartbeat reaps them.
+        
+        A client that passes the last sequence number it saw gets the frames it
+        missed replayed, or a "resync" frame when they are no longer buffered.
+        """
+        if len(self.sessions) >= WS_MAX_CONNECTIONS:
+            self.rejected += 1
+            await self.refuse(websocket, WS_CLOSE_TRY_AGAIN)
+            return None
+        if len(self.sessions_for(user_id)) >= WS_MAX_CONNECTIONS_PER_USER:
+            self.rejected += 1
+            await self.refuse(websocket, WS_CLOSE_POLICY)
+            return None
         await websocket.accept()
+        # Read before registering: frames published from here on are either delivered
+        # live or buffered with a later seq and replayed below
+        latest_seq = await self.backplane.latest_seq(user_id)
+        # No await from here to the replay, so live frames queue up behind the replayed ones
         self.active_connections[user_id].append(websocket)
+        session = self.sessions[websocket] = WebSocketSession(websocket, user_id)
+        session.writer = asyncio.create_task(self._writer(session))
+        self.enqueue(session, {"type": "session", "epoch": self.backplane.epoch, "latest_seq": latest_seq})
+        missed = None
+        if last_seq is None:
+            # Fresh client: only what was published while it connected
+            missed = self.replay.since(user_id, latest_seq, latest_seq)
+        elif epoch == self.backplane.epoch and last_seq <= latest_seq:
+            missed = self.replay.since(user_id, last_seq, latest_seq)
+        if missed is None:
+            self.resyncs += 1
+            self.enqueue(session, {"type": "resync"})
+        elif missed:
+            self.replayed += len(missed)
+            for message in missed:
+                self.enqueue(session, message)
         logger.info(f"WebSocket connected: user {user_id}")
+        return session
+    
+    async def refuse(self, websocket: WebSocket, code: int):
+        """Close a handshake with a code the client can see (closing before accept is a bare 403)"""
+        await websocket.accept()
+        await websocket.close(code=code)
+    
+    async def _writer(self, session: WebSocketSession):
+        """Drain one socket's outbox so a slow client only ever delays itself"""
+        try:
+            while True:
+                message = await session.outbox.get()
+                await asyncio.wait_for(session.websocket.send_json(message), WS_SEND_TIMEOUT_SECONDS)
+                self.sent += 1
+        except asyncio.TimeoutError:
+            self.evict(session, "send timed out")
+        except Exception:
+            # Socket is gone; stop routing frames to it
+            self.disconnect(session.websocket, session.user_id)
+    
+    def enqueue(self, session: WebSocketSession, message: dict):
+        """Queue a frame without waiting; overflow is handled by WS_SLOW_CONSUMER_POLICY"""
+        if session.closing:
+            return
+        try:
+            session.outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            if message.get("type") in WS_DROPPABLE_TYPES:
+                self.dropped += 1
+                return
+            if WS_SLOW_CONSUMER_POLICY != "drop":
+                self.evict(session, "send queue full")
+                return
+            # Make room by dropping the oldest queued frame
+            session.outbox.get_nowait()
+            session.outbox.put_nowait(message)
+            self.dropped += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, session.outbox.qsize())
+    
+    def evict(self, session: WebSocketSession, reason: str):
+        """Disconnect a consumer that cannot keep up"""
+        if session.closing:
+            return
+        session.closing = True
+        self.evicted += 1
+        logger.warning(f"Evicting WebSocket of user {session.user_id}: {reason}")
+        self.disconnect(session.websocket, session.user_id)
+        asyncio.create_task(self._close(session))
+    
+    async def _close(self, session: WebSocketSession):
+        try:
+            if session.conversation_id:
+                await self.backplane.clear_presence(session)
+            await asyncio.wait_for(session.websocket.close(code=WS_CLOSE_EVICTED), WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+    
+    async def release(self, websocket: WebSocket, user_id: str):
+        """Disconnect and drop any shared presence the socket left behind"""
+        session = self.sessions.get(websocket)
+        self.disconnect(websocket, user_id)
+        if session and session.conversation_id:
+            try:
+                await self.backplane.clear_presence(session)
+            except Exception as e:
+                logger.error(f"Presence cleanup failed: {e}")
+    
+    async def set_focus(self, websocket: WebSocket, conversation_id: Optional[str]):
+        """Remember which conversation the socket has open (refreshing shared presence sparingly)"""
+        session = self.sessions.get(websocket)
+        if session is None:
+            return
+        now = time.monotonic()
+        if session.conversation_id == conversation_id and now - session.presence_written_at < WS_PRESENCE_REFRESH_SECONDS:
+            return
+        session.conversation_id = conversation_id
+        session.presence_written_at = now
+        await self.backplane.set_presence(session)
+    
+    async def is_viewing(self, user_id: str, conversation_id: str) -> bool:
+        """True if the user has a socket with this conversation open on any worker"""
+        for websocket in self.active_connections.get(user_id, []):
+            session = self.sessions.get(websocket)
+            if session and session.conversation_id == conversation_id:
+                return True
+        return await self.backplane.is_viewing(user_id, conversation_id)
+    
+    def sessions_for(self, user_id: str) -> List[WebSocketSession]:
+        return [self.sessions[ws] for ws in self.active_connections.get(user_id, []) if ws in self.sessions]
     
     def disconnect(self, websocket: WebSocket, user_id: str):
+        session = self.sessions.pop(websocket, None)
+        if session and session.writer and session.writer is not asyncio.current_task():
+            session.writer.cancel()
         if user_id in self.active_connections:
             if websocket in self.active_connections[user_id]:
                 self.active_connections[user_id].remove(websocket)
@@ -122,26 +1256,147 @@ class ConnectionManager:
                 del self.active_connections[user_id]
         logger.info(f"WebSocket disconnected: user {user_id}")
     
+    def on_control(self, name: str, handler):
+        self.control_handlers[name] = handler
+    
+    async def publish_control(self, name: str, payload: dict):
+        """Run a control handler on every worker (not delivered to sockets)"""
+        await self.backplane.publish({"control": name, "payload": payload})
+    
+    async def deliver_local(self, event: dict):
+        """Deliver a backplane event to the sockets connected to this worker"""
+        if "control" in event:
+            handler = self.control_handlers.get(event["control"])
+            if handler:
+                handler(event["payload"])
+            return
+        seqs = event.get("seqs")
+        for user_id in event["user_ids"]:
+            message = event["message"]
+            if seqs:
+                message = {**message, "seq": seqs[user_id]}
+                self.replay.append(user_id, seqs[user_id], message)
+            for session in self.sessions_for(user_id):
+                self.enqueue(session, message)
+    
+    async def publish(self, user_ids: List[str], message: dict):
+        event = {"user_ids": user_ids, "message": message}
+        if message.get("type") in WS_REPLAYABLE_TYPES:
+            seqs = await asyncio.gather(*(self.backplane.next_seq(user_id) for user_id in user_ids))
+            event["seqs"] = dict(zip(user_ids, seqs))
+        await self.backplane.publish(event)
+    
     async def send_to_user(self, user_id: str, message: dict):
-        """Send message to all connections of a specific user"""
-        if user_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.active_connections[user_id].remove(conn)
+        """Send message to all connections of a specific user, on any worker"""
+        await self.publish([user_id], message)
     
     async def broadcast_to_conversation(self, conversation_id: str, participants: List[str], message: dict):
         """Send message to all participants of a conversation"""
-        for user_id in participants:
-            await self.send_to_user(user_id, message)
+        await self.publish(list(participants), message)
+    
+    def metrics(self) -> dict:
+        depths = [session.outbox.qsize() for session in self.sessions.values()]
+        return {
+            "connections": len(depths),
+            "users": len(self.active_connections),
+            "reaped": self.reaped,
+            "rejected": self.rejected,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": self.peak_queue_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "replayed": self.replayed,
+            "resyncs": self.resyncs,
+        }
 
-ws_manager = ConnectionManager()
+ws_manager = ConnectionManager(MongoBackplane() if WS_BACKPLANE == "mongo" else InProcessBackplane())
+ws_manager.on_control("invalidate_user", lambda payload: user_cache.invalidate(payload["user_id"]))
+
+# Session cache invalidation (published with ws_manager.publish_control, runs on every worker)
+def on_block_changed(payload: dict):
+    for session in ws_manager.sessions_for(payload["blocked_id"]):
+        session.blocked_by.pop(payload["blocker_id"], None)
+
+def on_conversations_deleted(payload: dict):
+    """Payload names either conversation_ids or a participant whose conversations are gone"""
+    conversation_ids = set(payload.get("conversation_ids", []))
+    participant = payload.get("participant")
+    for session in ws_manager.sessions.values():
+        for conversation_id, participants in list(session.conversations.items()):
+            if conversation_id in conversation_ids or participant in participants:
+                del session.conversations[conversation_id]
+
+def on_profile_changed(payload: dict):
+    for session in ws_manager.sessions_for(payload["user_id"]):
+        session.profile_loaded = False
+
+ws_manager.on_control("block_changed", on_block_changed)
+ws_manager.on_control("conversations_deleted", on_conversations_deleted)
+ws_manager.on_control("profile_changed", on_profile_changed)
+
+class TypingThrottle:
+    """Forwards at most one typing event per conversation and sender per window.
+    
+    Each typing frame pushes back a debounce timer; when it fires without a
+    newer frame the other participant gets a single "typing_stopped" event.
+    """
+    def __init__(self, window: float, stop_after: float):
+        self.window = window
+        self.stop_after = stop_after
+        # (conversation_id, sender_id) -> [last forwarded at, recipient_id, stop timer]
+        self.state: Dict[tuple, list] = {}
+        self.received = 0
+        self.forwarded = 0
+    
+    async def typing(self, conversation_id: str, sender_id: str, recipient_id: str):
+        self.received += 1
+        key = (conversation_id, sender_id)
+        now = time.monotonic()
+        entry = self.state.get(key)
+        if entry is None:
+            entry = self.state[key] = [0.0, recipient_id, None]
+        else:
+            entry[2].cancel()
+        entry[2] = asyncio.get_running_loop().call_later(self.stop_after, self._stopped, key)
+        if now - entry[0] >= self.window:
+            entry[0] = now
+            self.forwarded += 1
+            await ws_manager.send_to_user(recipient_id, {
+                "type": "typing",
+                "conversation_id": conversation_id,
+                "user_id": sender_id
+            })
+    
+    def clear(self, conversation_id: str, sender_id: str):
+        """Sender's message arrived; new_message already ends the indicator"""
+        entry = self.state.pop((conversation_id, sender_id), None)
+        if entry is not None:
+            entry[2].cancel()
+    
+    def _stopped(self, key: tuple):
+        entry = self.state.pop(key, None)
+        if entry is None:
+            return
+        self.forwarded += 1
+        asyncio.create_task(ws_manager.send_to_user(entry[1], {
+            "type": "typing_stopped",
+            "conversation_id": key[0],
+            "user_id": key[1]
+        }))
+    
+    def metrics(self) -> dict:
+        return {
+            "active": len(self.state),
+            "received": self.received,
+            "forwarded": self.forwarded,
+        }
+
+typing_throttle = TypingThrottle(
+    window=float(os.environ.get("TYPING_THROTTLE_SECONDS", "3")),
+    stop_after=float(os.environ.get("TYPING_STOP_SECONDS", "4"))
+)
 
 # ============= MODELS =============
 class RegisterStep1(BaseModel):
@@ -266,7 +1521,7 @@ async def register_step1(data: RegisterStep1):
     verification = {
         "id": verification_id,
         "email": data.email,
-        "password_hash": get_password_hash(data.password),
+        "password_hash": await get_password_hash(data.password),
         "first_name": data.first_name,
         "last_name": data.last_name,
         "verification_code": verification_code,
@@ -305,6 +1560,7 @@ async def verify_email(data: VerifyEmail):
     user = {
         "id": user_id,
         "email": verification["email"],
+        "email_search": fold_email(verification["email"]),
         "password_hash": verification["password_hash"],
         "first_name": verification["first_name"],
         "last_name": verification["last_name"],
@@ -313,12 +1569,13 @@ async def verify_email(data: VerifyEmail):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.users.insert_one(user)
+    platform_counters.add(total_users=1)
     
     # Clean up verification
     await db.verifications.delete_one({"id": data.verification_id})
     
     # Generate token
-    access_token = create_access_token(data={"sub": user_id})
+    access_token = create_user_token(user)
     
     return {
         "access_token": access_token,
@@ -360,10 +1617,10 @@ async def resend_verification_code(verification_id: str):
 @api_router.post("/auth/login")
 async def login(data: Login):
     user = await db.users.find_one({"email": data.email}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user or not await verify_password(data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
     
-    access_token = create_access_token(data={"sub": user["id"]})
+    access_token = create_user_token(user)
     
     return {
         "access_token": access_token,
@@ -443,11 +1700,12 @@ async def reset_password(data: ResetPassword):
         raise HTTPException(status_code=400, detail="Sıfırlama talebinin süresi dolmuş")
     
     # Update password
-    new_hash = get_password_hash(data.new_password)
+    new_hash = await get_password_hash(data.new_password)
     await db.users.update_one(
         {"id": reset["user_id"]},
-        {"$set": {"password_hash": new_hash}}
+        {"$set": {"password_hash": new_hash}, "$inc": {"token_version": 1}}
     )
+    await invalidate_user(reset["user_id"])
     
     # Mark reset as used
     await db.password_resets.update_one(
@@ -460,9 +1718,7 @@ async def reset_password(data: ResetPassword):
 @api_router.post("/auth/change-password")
 async def change_password(data: ChangePassword, current_user: dict = Depends(get_current_user)):
     """Change password for logged in user"""
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
-    
-    if not verify_password(data.current_password, user["password_hash"]):
+    if not await verify_password(data.current_password, current_user["password_hash"]):
         raise HTTPException(status_code=400, detail="Mevcut şifre hatalı")
     
     # Check if new password is same as current
@@ -480,13 +1736,20 @@ async def change_password(data: ChangePassword, current_user: dict = Depends(get
     if not re.search(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\/]', data.new_password):
         raise HTTPException(status_code=400, detail="Şifre en az 1 özel karakter içermelidir")
     
-    new_hash = get_password_hash(data.new_password)
+    new_hash = await get_password_hash(data.new_password)
     await db.users.update_one(
         {"id": current_user["id"]},
-        {"$set": {"password_hash": new_hash}}
+        {"$set": {"password_hash": new_hash}, "$inc": {"token_version": 1}}
     )
+    await invalidate_user(current_user["id"])
     
-    return {"message": "Şifreniz başarıyla değiştirildi"}
+    # Older tokens are revoked; hand the caller a fresh one
+    token_version = current_user.get("token_version", 0) + 1
+    return {
+        "message": "Şifreniz başarıyla değiştirildi",
+        "access_token": create_user_token({"id": current_user["id"], "token_version": token_version}),
+        "token_type": "bearer"
+    }
 
 @api_router.get("/auth/me")
 async def get_me(current_user: dict = Depends(get_current_user)):
@@ -534,11 +1797,129 @@ async def get_account_deletion_status(current_user: dict = Depends(get_current_u
     }, {"_id": 0})
     return {"has_pending_request": request is not None, "request": request}
 
-# ============= POSITIONS ENDPOINT =============
+# ============= REFERENCE DATA =============
+# Constants only change with a release, so every payload is encoded once at import
+# and served as bytes with a strong ETag; clients revalidate and get 304s.
+class EncodedJSON:
+    """JSON payload encoded once, versioned by its content hash"""
+    def __init__(self, data, version: Optional[str] = None):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        self.version = version or hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+    
+    def response(self, request: Request, cache_control: str = "public, no-cache") -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+REFERENCE_DATA = {
+    "provinces": PROVINCES,
+    "districts": DISTRICTS,
+    "institutions": INSTITUTIONS,
+    "positions": sorted(POSITIONS),
+    "faq": FAQ_DATA,
+}
+REFERENCE_VERSION = EncodedJSON(REFERENCE_DATA).version
+BOOTSTRAP_JSON = EncodedJSON({"version": REFERENCE_VERSION, **REFERENCE_DATA}, REFERENCE_VERSION)
+PROVINCES_JSON = EncodedJSON(PROVINCES)
+INSTITUTIONS_JSON = EncodedJSON(INSTITUTIONS)
+POSITIONS_JSON = EncodedJSON(POSITIONS)
+SORTED_POSITIONS_JSON = EncodedJSON(REFERENCE_DATA["positions"])
+FAQ_JSON = EncodedJSON(FAQ_DATA)
+DISTRICTS_JSON = {province: EncodedJSON(districts) for province, districts in DISTRICTS.items()}
+EMPTY_LIST_JSON = EncodedJSON([])
+
+class AutocompleteIndex:
+    """In-memory autocomplete over a list of strings, folded with fold_turkish.
+    
+    Every word of an entry goes into a prefix trie whose nodes hold the ids of the
+    entries below them; word trigrams cover matches inside words. Query words are
+    ANDed. Ranking: whole-entry prefix, then word prefixes, then infix matches,
+    shorter entries first, then insertion order.
+    """
+    def __init__(self, entries=()):
+        self.entries: List[str] = []
+        self.folded: List[str] = []
+        self.trie: dict = {}
+        self.grams: Dict[str, set] = defaultdict(set)
+        self.positions: Dict[str, int] = {}
+        for entry in entries:
+            self.add(entry)
+    
+    def add(self, entry: str):
+        if not entry or entry in self.positions:
+            return
+        entry_id = self.positions[entry] = len(self.entries)
+        folded = fold_turkish(entry)
+        self.entries.append(entry)
+        self.folded.append(folded)
+        for word in folded.split():
+            node = self.trie
+            for char in word:
+                node = node.setdefault(char, {"": set()})
+                node[""].add(entry_id)
+            for i in range(len(word) - 2):
+                self.grams[word[i:i + 3]].add(entry_id)
+    
+    def _prefix_ids(self, word: str) -> set:
+        node = self.trie
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node[""]
+    
+    def _word_ids(self, word: str) -> tuple:
+        """(ids matching the word anywhere, ids where some word starts with it)"""
+        prefix = self._prefix_ids(word)
+        if len(word) < 3:
+            return prefix, prefix
+        candidates = set.intersection(*(self.grams.get(word[i:i + 3], set()) for i in range(len(word) - 2)))
+        return prefix | {i for i in candidates if word in self.folded[i]}, prefix
+    
+    def search(self, q: str, limit: int = 20) -> List[str]:
+        words = fold_turkish(q).split()
+        if not words:
+            return self.entries[:limit]
+        matched = prefixed = None
+        for word in words:
+            ids, prefix_ids = self._word_ids(word)
+            matched = ids if matched is None else matched & ids
+            prefixed = prefix_ids if prefixed is None else prefixed & prefix_ids
+            if not matched:
+                return []
+        query = " ".join(words)
+        
+        def rank(entry_id: int) -> tuple:
+            folded = self.folded[entry_id]
+            tier = 0 if folded.startswith(query) else 1 if entry_id in prefixed else 2
+            return (tier, len(folded), entry_id)
+        
+        return [self.entries[i] for i in heapq.nsmallest(limit, matched, key=rank)]
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+INSTITUTION_AUTOCOMPLETE = AutocompleteIndex(INSTITUTIONS)
+POSITION_AUTOCOMPLETE = AutocompleteIndex(REFERENCE_DATA["positions"])
+DISTRICT_AUTOCOMPLETE = {province: AutocompleteIndex(districts) for province, districts in DISTRICTS.items()}
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """All reference data in one payload; "version" names the immutable URL below"""
+    return BOOTSTRAP_JSON.response(request)
+
+@api_router.get("/bootstrap/{version}")
+async def get_bootstrap_version(version: str, request: Request):
+    if version != REFERENCE_VERSION:
+        # Stale version from an older client: current data, but not cacheable forever
+        return BOOTSTRAP_JSON.response(request)
+    return BOOTSTRAP_JSON.response(request, "public, max-age=31536000, immutable")
+
 @api_router.get("/positions")
-async def get_positions():
+async def get_positions(request: Request):
     """Get list of available positions"""
-    return POSITIONS
+    return POSITIONS_JSON.response(request)
 
 # ============= PROFILE ENDPOINTS =============
 @api_router.post("/profile")
@@ -557,6 +1938,7 @@ async def complete_profile(data: CompleteProfile, current_user: dict = Depends(g
     }
     await db.profiles.insert_one(profile)
     await db.users.update_one({"id": current_user["id"]}, {"$set": {"profile_completed": True}})
+    await invalidate_user(current_user["id"])
     
     # Remove MongoDB _id before returning
     profile.pop("_id", None)
@@ -604,6 +1986,7 @@ async def request_profile_update(data: RequestProfileUpdate, current_user: dict
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.profile_update_requests.insert_one(request)
+    platform_counters.add(pending_profile_updates=1)
     
     return {"message": "Profil güncelleme talebiniz alındı. Admin onayından sonra profiliniz güncellenecektir."}
 
@@ -672,6 +2055,7 @@ async def upload_avatar(file: UploadFile = File(...), current_user: dict = Depen
         {"user_id": current_user["id"]},
         {"$set": {"avatar_url": avatar_url}}
     )
+    await ws_manager.publish_control("profile_changed", {"user_id": current_user["id"]})
     
     return {"message": "Profil fotoğrafı yüklendi", "avatar_url": avatar_url}
 
@@ -693,6 +2077,7 @@ async def delete_avatar(current_user: dict = Depends(get_current_user)):
         {"user_id": current_user["id"]},
         {"$set": {"avatar_url": None}}
     )
+    await ws_manager.publish_control("profile_changed", {"user_id": current_user["id"]})
     
     return {"message": "Profil fotoğrafı silindi"}
 
@@ -728,7 +2113,8 @@ async def create_listing(data: CreateListing, current_user: dict = Depends(get_c
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.listings.insert_one(listing)
+    await db.listings.insert_one({**listing, **listing_search_fields(listing)})
+    platform_counters.add(total_listings=1)
     
     # Create notification for user
     await create_notification(
@@ -744,6 +2130,7 @@ async def create_listing(data: CreateListing, current_user: dict = Depends(get_c
 
 @api_router.get("/listings")
 async def get_listings(
+    response: Response,
     title: Optional[str] = None,
     institution: Optional[str] = None,
     role: Optional[str] = None,
@@ -751,7 +2138,8 @@ async def get_listings(
     desired_province: Optional[str] = None,
     province: Optional[str] = None,  # New: search both current and desired province
     listing_status: str = "active",
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
     query = {"status": listing_status}
     
@@ -759,9 +2147,8 @@ async def get_listings(
     or_conditions = []
     
     if title:
-        or_conditions.append({"title": {"$regex": title, "$options": "i"}})
-        or_conditions.append({"institution": {"$regex": title, "$options": "i"}})
-        or_conditions.append({"role": {"$regex": title, "$options": "i"}})  # Also search in role/position
+        # Folded text search over title, institution and role (see search_query)
+        query.update(search_query(title))
     
     if institution:
         query["institution"] = {"$regex": institution, "$options": "i"}
@@ -783,32 +2170,28 @@ async def get_listings(
         else:
             query["$or"] = or_conditions
     
-    listings = await db.listings.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    listings, next_cursor = await paginate(db.listings, query, LISTING_PROJECTION, clamp_limit(limit, 100), cursor)
+    set_next_cursor(response, next_cursor)
     
-    # Enrich with profile data and user info for initials
+    # Enrich with profile data and user info for initials (one $in query per collection)
+    loader = EnrichmentLoader()
+    user_ids = [listing["user_id"] for listing in listings]
+    profiles = await loader.profiles(user_ids)
+    users = await loader.users(user_ids, {"first_name": 1, "last_name": 1})
     for listing in listings:
-        profile = await db.profiles.find_one({"user_id": listing["user_id"]}, {"_id": 0})
-        listing["profile"] = profile
-        
-        # Get user for initials
-        user = await db.users.find_one({"id": listing["user_id"]}, {"_id": 0, "first_name": 1, "last_name": 1})
-        if user:
-            first_initial = user.get("first_name", "?")[0].upper() if user.get("first_name") else "?"
-            last_initial = user.get("last_name", "?")[0].upper() if user.get("last_name") else "?"
-            listing["user_initials"] = f"{first_initial}{last_initial}"
-        else:
-            listing["user_initials"] = "??"
+        listing["profile"] = profiles.get(listing["user_id"])
+        listing["user_initials"] = user_initials(users.get(listing["user_id"]))
     
     return listings
 
 @api_router.get("/listings/my")
 async def get_my_listings(current_user: dict = Depends(get_current_user)):
-    listings = await db.listings.find({"user_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
+    listings = await db.listings.find({"user_id": current_user["id"]}, LISTING_PROJECTION).sort("created_at", -1).to_list(100)
     return listings
 
 @api_router.get("/listings/{listing_id}")
 async def get_listing(listing_id: str):
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
     
@@ -819,7 +2202,7 @@ async def get_listing(listing_id: str):
 
 @api_router.put("/listings/{listing_id}")
 async def update_listing(listing_id: str, data: UpdateListing, current_user: dict = Depends(get_current_user)):
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
     
@@ -828,14 +2211,17 @@ async def update_listing(listing_id: str, data: UpdateListing, current_user: dic
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    if any(field in update_data for field in ("title", "institution", "role")):
+        update_data.update(listing_search_fields({**listing, **update_data}))
     
     await db.listings.update_one({"id": listing_id}, {"$set": update_data})
+    await match_index.refresh(listing_id)
     
     return {"message": "İlan güncellendi"}
 
 @api_router.delete("/listings/{listing_id}")
 async def delete_listing(listing_id: str, current_user: dict = Depends(get_current_user)):
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
     
@@ -847,7 +2233,7 @@ async def delete_listing(listing_id: str, current_user: dict = Depends(get_curre
 
 @api_router.post("/listings/{listing_id}/request-deletion")
 async def request_listing_deletion(listing_id: str, data: RequestListingDeletion, current_user: dict = Depends(get_current_user)):
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
     
@@ -872,6 +2258,7 @@ async def request_listing_deletion(listing_id: str, data: RequestListingDeletion
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.deletion_requests.insert_one(deletion_request)
+    platform_counters.add(pending_deletions=1)
     
     return {"message": "Silme isteği gönderildi. Admin onayı bekleniyor.", "request_id": deletion_request["id"]}
 
@@ -884,11 +2271,425 @@ async def get_my_deletion_requests(current_user: dict = Depends(get_current_user
     
     # Enrich with listing data
     for req in requests:
-        listing = await db.listings.find_one({"id": req["listing_id"]}, {"_id": 0})
+        listing = await db.listings.find_one({"id": req["listing_id"]}, LISTING_PROJECTION)
         req["listing"] = listing
     
     return requests
 
+# ============= SWAP MATCHING =============
+MATCH_LISTING_FIELDS = [
+    "id", "user_id", "title", "institution", "role",
+    "current_province", "current_district", "desired_province", "desired_district",
+    "created_at",
+]
+MATCH_INDEX_REFRESH_SECONDS = int(os.environ.get("MATCH_INDEX_REFRESH_SECONDS", "300"))
+MATCH_INDEX_RETRY_SECONDS = int(os.environ.get("MATCH_INDEX_RETRY_SECONDS", "15"))
+LEADERBOARD_TTL_SECONDS = int(os.environ.get("LEADERBOARD_TTL_SECONDS", "60"))
+LEADERBOARD_MAX_LIMIT = 50
+
+def normalize_role(role: Optional[str]) -> str:
+    """Role comparison used for matching (same rule as send_invitation)"""
+    return (role or "").lower().strip()
+
+class Leaderboard:
+    """Active-listing counts per value of one listing field (role, institution).
+    
+    Counts move with every MatchIndex change; the sorted top list is rebuilt from
+    them at most once per TTL, so reads never touch the database.
+    """
+    def __init__(self, field: str, ttl: int = LEADERBOARD_TTL_SECONDS):
+        self.field = field
+        self.ttl = ttl
+        self.counts: Counter = Counter()
+        self.ranked: List[tuple] = []
+        self.ranked_at = 0.0
+    
+    def add(self, listing: dict, delta: int):
+        value = listing.get(self.field)
+        if not value:
+            return
+        self.counts[value] += delta
+        if self.counts[value] <= 0:
+            del self.counts[value]
+    
+    def reset(self, listings):
+        self.counts = Counter(listing.get(self.field) for listing in listings if listing.get(self.field))
+        self.ranked_at = 0.0
+    
+    def top(self, limit: int) -> List[tuple]:
+        now = time.monotonic()
+        if now - self.ranked_at >= self.ttl:
+            self.ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:LEADERBOARD_MAX_LIMIT]
+            self.ranked_at = now
+        return self.ranked[:limit]
+
+class MatchIndex:
+    """In-memory inverted index of active listings.
+
+    Listings are bucketed by (role, current_province, desired_province); the reciprocal
+    partners of a listing live in the bucket (role, desired_province, current_province),
+    so a lookup costs O(matches) instead of a collection scan.
+    """
+    def __init__(self):
+        self.buckets: Dict[tuple, Dict[str, dict]] = defaultdict(dict)
+        self.keys_by_listing: Dict[str, tuple] = {}
+        self.loaded = False
+        self.loading: Optional[asyncio.Task] = None
+        self.leaderboards = {"role": Leaderboard("role"), "institution": Leaderboard("institution")}
+    
+    @staticmethod
+    def key_for(listing: dict) -> tuple:
+        return (normalize_role(listing.get("role")), listing.get("current_province"), listing.get("desired_province"))
+    
+    def upsert(self, listing: dict):
+        """Index an active listing, or drop it if it is no longer active"""
+        self.remove(listing["id"])
+        if listing.get("status") != "active":
+            return
+        key = self.key_for(listing)
+        entry = self.buckets[key][listing["id"]] = {field: listing.get(field) for field in MATCH_LISTING_FIELDS}
+        self.keys_by_listing[listing["id"]] = key
+        for leaderboard in self.leaderboards.values():
+            leaderboard.add(entry, 1)
+    
+    def remove(self, listing_id: str):
+        key = self.keys_by_listing.pop(listing_id, None)
+        if key is None:
+            return
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            entry = bucket.pop(listing_id, None)
+            if entry is not None:
+                for leaderboard in self.leaderboards.values():
+                    leaderboard.add(entry, -1)
+            if not bucket:
+                del self.buckets[key]
+    
+    def remove_user(self, user_id: str):
+        for listing_id in [lid for lid, key in self.keys_by_listing.items()
+                           if self.buckets[key][lid]["user_id"] == user_id]:
+            self.remove(listing_id)
+    
+    def matches_for(self, listing: dict) -> List[dict]:
+        """Active listings with the same role that sit where this listing wants to go and vice versa"""
+        role, current_province, desired_province = self.key_for(listing)
+        bucket = self.buckets.get((role, desired_province, current_province), {})
+        return [m for m in bucket.values() if m["user_id"] != listing.get("user_id")]
+    
+    async def rebuild(self):
+        buckets: Dict[tuple, Dict[str, dict]] = defaultdict(dict)
+        keys_by_listing: Dict[str, tuple] = {}
+        projection = {"_id": 0, **{field: 1 for field in MATCH_LISTING_FIELDS}}
+        async for listing in db.listings.find({"status": "active"}, projection):
+            key = self.key_for(listing)
+            buckets[key][listing["id"]] = {field: listing.get(field) for field in MATCH_LISTING_FIELDS}
+            keys_by_listing[listing["id"]] = key
+        self.buckets, self.keys_by_listing = buckets, keys_by_listing
+        for leaderboard in self.leaderboards.values():
+            leaderboard.reset(entry for bucket in buckets.values() for entry in bucket.values())
+        self.loaded = True
+        logger.info(f"Match index built: {len(keys_by_listing)} active listings in {len(buckets)} buckets")
+    
+    async def ensure_loaded(self):
+        """Build the index if it has never loaded, sharing one build between concurrent callers"""
+        if self.loaded:
+            return
+        if self.loading is None or self.loading.done():
+            self.loading = asyncio.create_task(self.rebuild())
+        await asyncio.shield(self.loading)
+    
+    async def refresh(self, listing_id: str):
+        """Re-read a single listing after a write and update its entry"""
+        listing = await db.listings.find_one({"id": listing_id}, {"_id": 0, "status": 1, **{f: 1 for f in MATCH_LISTING_FIELDS}})
+        if listing:
+            self.upsert(listing)
+        else:
+            self.remove(listing_id)
+
+match_index = MatchIndex()
+
+async def match_index_refresh_loop():
+    """Periodic rebuild so workers converge on writes made by other workers.
+    
+    Retries sooner while the index has never loaded (e.g. the startup build failed).
+    """
+    while True:
+        await asyncio.sleep(MATCH_INDEX_REFRESH_SECONDS if match_index.loaded else MATCH_INDEX_RETRY_SECONDS)
+        try:
+            await match_index.rebuild()
+        except Exception as e:
+            logger.error(f"Match index rebuild failed: {e}")
+
+async def enrich_matches(matches: List[dict], loader: Optional[EnrichmentLoader] = None) -> List[dict]:
+    """Attach profile and initials to each match, newest first.
+    
+    Pass a loader that has already fetched the ids to share its lookups across calls.
+    """
+    loader = loader or EnrichmentLoader()
+    user_ids = [m["user_id"] for m in matches]
+    profiles = await loader.profiles(user_ids)
+    users = await loader.users(user_ids, {"first_name": 1, "last_name": 1})
+    return [
+        {**m, "profile": profiles.get(m["user_id"]), "user_initials": user_initials(users.get(m["user_id"]))}
+        for m in sorted(matches, key=lambda m: m.get("created_at") or "", reverse=True)
+    ]
+
+@api_router.get("/listings/{listing_id}/matches")
+async def get_listing_matches(listing_id: str):
+    """Reciprocal swap partners for a listing"""
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
+    if not listing:
+        raise HTTPException(status_code=404, detail="İlan bulunamadı")
+    if listing.get("status") != "active":
+        return []
+    await match_index.ensure_loaded()
+    return await enrich_matches(match_index.matches_for(listing))
+
+@api_router.get("/matches/my")
+async def get_my_matches(current_user: dict = Depends(get_current_user)):
+    """Reciprocal swap partners for each of the current user's active listings"""
+    await match_index.ensure_loaded()
+    listings = await db.listings.find(
+        {"user_id": current_user["id"], "status": "active"}, LISTING_PROJECTION
+    ).sort("created_at", -1).to_list(100)
+    
+    matches_by_listing = [(listing, match_index.matches_for(listing)) for listing in listings]
+    # Fetch every partner once up front; each enrich_matches call below then hits the loader cache
+    loader = EnrichmentLoader()
+    user_ids = [m["user_id"] for _, matches in matches_by_listing for m in matches]
+    await loader.profiles(user_ids)
+    await loader.users(user_ids, {"first_name": 1, "last_name": 1})
+    return [
+        {"listing": listing, "matches": await enrich_matches(matches, loader)}
+        for listing, matches in matches_by_listing
+    ]
+
+# ============= SWAP CYCLES =============
+# Multi-party swaps: per role, provinces are nodes and active listings are edges
+# (current_province -> desired_province). A directed cycle A->B->C->A lets three
+# people rotate into each other's posts. Pairwise swaps are served by the match index.
+SWAP_CYCLE_MAX_LENGTH = 4
+SWAP_CYCLE_LIMIT_PER_ROLE = int(os.environ.get("SWAP_CYCLE_LIMIT_PER_ROLE", "500"))
+# A listing takes part in at most this many proposals, so dense corners cannot use up the role's budget
+SWAP_CYCLE_LIMIT_PER_LISTING = int(os.environ.get("SWAP_CYCLE_LIMIT_PER_LISTING", "10"))
+# Province cycles examined per role before giving up on filling the budget
+SWAP_CYCLE_SCAN_LIMIT = int(os.environ.get("SWAP_CYCLE_SCAN_LIMIT", "20000"))
+SWAP_CYCLE_INTERVAL_SECONDS = int(os.environ.get("SWAP_CYCLE_INTERVAL_SECONDS", "600"))
+# The periodic job runs on whichever worker holds this lease; it lapses if that worker dies
+SWAP_CYCLE_LEASE = "swap_cycles"
+SWAP_CYCLE_LEASE_SECONDS = SWAP_CYCLE_INTERVAL_SECONDS * 2
+
+def iter_bits(mask: int):
+    """Yield the indices of the set bits of mask in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def cycles_from(start: int, length: int, out_masks: List[int], in_masks: List[int]):
+    """Yield the cycles of the given length whose smallest node is start"""
+    higher = ~((1 << (start + 1)) - 1)
+    # Depth-first over paths start -> ... whose nodes are all > start
+    stack = [((start,), 1 << start)]
+    while stack:
+        path, used = stack.pop()
+        tail = path[-1]
+        candidates = out_masks[tail] & higher & ~used
+        if len(path) == length - 1:
+            for last in iter_bits(candidates & in_masks[start]):
+                yield path + (last,)
+        else:
+            for nxt in iter_bits(candidates):
+                stack.append((path + (nxt,), used | (1 << nxt)))
+
+def find_cycles(out_masks: List[int], in_masks: List[int], max_length: int = SWAP_CYCLE_MAX_LENGTH):
+    """Yield directed cycles of length 3..max_length, shortest first.
+
+    Adjacency rows are integer bitsets, so every neighbour test is a single AND.
+    Each cycle is reported once, rotated so that it starts at its smallest node.
+    Within a length the start nodes take turns, so a consumer that stops early
+    has not spent its budget on the cycles through the first few nodes.
+    """
+    n = len(out_masks)
+    for length in range(3, max_length + 1):
+        walkers = [cycles_from(a, length, out_masks, in_masks) for a in range(n)]
+        while walkers:
+            remaining = []
+            for walker in walkers:
+                cycle = next(walker, None)
+                if cycle is not None:
+                    yield cycle
+                    remaining.append(walker)
+            walkers = remaining
+
+def role_fingerprint(buckets: Dict[tuple, Dict[str, dict]]) -> str:
+    digest = hashlib.sha256()
+    for key in sorted(buckets):
+        digest.update(f"{key[1]}>{key[2]}:".encode())
+        digest.update(",".join(sorted(buckets[key])).encode())
+    return digest.hexdigest()
+
+def build_role_cycles(role: str, buckets: Dict[tuple, Dict[str, dict]], computed_at: str) -> List[dict]:
+    """Turn the province cycles of one role into concrete chain proposals"""
+    provinces = sorted({p for key in buckets for p in key[1:]})
+    position = {p: i for i, p in enumerate(provinces)}
+    out_masks = [0] * len(provinces)
+    in_masks = [0] * len(provinces)
+    for _, current_province, desired_province in buckets:
+        if current_province == desired_province:
+            continue
+        src, dst = position[current_province], position[desired_province]
+        out_masks[src] |= 1 << dst
+        in_masks[dst] |= 1 << src
+    
+    # Oldest listing first on every edge
+    edges = {
+        (key[1], key[2]): sorted(bucket.values(), key=lambda listing: listing.get("created_at") or "")
+        for key, bucket in buckets.items()
+    }
+    # Proposals per listing so far; the budget is counted on resolved proposals, not raw cycles
+    usage: Counter = Counter()
+    proposals = []
+    for scanned, cycle in enumerate(find_cycles(out_masks, in_masks)):
+        if len(proposals) >= SWAP_CYCLE_LIMIT_PER_ROLE or scanned >= SWAP_CYCLE_SCAN_LIMIT:
+            break
+        names = [provinces[i] for i in cycle]
+        steps, used_users = [], set()
+        for i, from_province in enumerate(names):
+            to_province = names[(i + 1) % len(names)]
+            # Least used listing on the edge (oldest on ties) that still has room
+            listing = min(
+                (l for l in edges[(from_province, to_province)]
+                 if l["user_id"] not in used_users and usage[l["id"]] < SWAP_CYCLE_LIMIT_PER_LISTING),
+                key=lambda l: usage[l["id"]], default=None
+            )
+            if listing is None:
+                break
+            used_users.add(listing["user_id"])
+            steps.append({
+                "listing_id": listing["id"],
+                "user_id": listing["user_id"],
+                "title": listing.get("title"),
+                "institution": listing.get("institution"),
+                "from_province": from_province,
+                "to_province": to_province,
+            })
+        if len(steps) != len(names):
+            continue
+        usage.update(step["listing_id"] for step in steps)
+        proposals.append({
+            "id": str(uuid.uuid4()),
+            "role": role,
+            "role_label": next(iter(next(iter(buckets.values())).values())).get("role"),
+            "length": len(steps),
+            "provinces": names,
+            "steps": steps,
+            "listing_ids": [step["listing_id"] for step in steps],
+            "user_ids": [step["user_id"] for step in steps],
+            "computed_at": computed_at,
+        })
+    return proposals
+
+async def replace_role_cycles(role: str, proposals: List[dict], fingerprint: str, computed_at: str) -> bool:
+    """Publish a role's proposals as one run, unless a newer run already did.
+    
+    Proposals are inserted under a fresh run_id, then swap_cycle_roles is pointed at
+    that run (only if it is newer than the current one) and older runs are deleted.
+    Readers only return proposals of the run the role points at, so they never see
+    two runs at once or an empty role mid-swap.
+    """
+    from pymongo.errors import DuplicateKeyError
+    run_id = str(uuid.uuid4())
+    for proposal in proposals:
+        proposal["run_id"] = run_id
+    if proposals:
+        await db.swap_cycles.insert_many(proposals)
+    try:
+        await db.swap_cycle_roles.update_one(
+            {"role": role, "$or": [{"computed_at": {"$lt": computed_at}}, {"run_id": {"$exists": False}}]},
+            {"$set": {"fingerprint": fingerprint, "cycle_count": len(proposals), "computed_at": computed_at, "run_id": run_id}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent run computed from a newer snapshot owns the role
+        await db.swap_cycles.delete_many({"run_id": run_id})
+        return False
+    await db.swap_cycles.delete_many({"role": role, "run_id": {"$ne": run_id}, "computed_at": {"$lte": computed_at}})
+    return True
+
+async def current_cycles(query: dict, limit: int = 50) -> List[dict]:
+    """Proposals matching query that belong to their role's current run, shortest first"""
+    # While a run is being swapped in a role can briefly have two runs stored
+    cycles = await db.swap_cycles.find(query, {"_id": 0}).sort("length", 1).to_list(limit * 2)
+    roles = list({cycle["role"] for cycle in cycles})
+    current = {doc.get("run_id") async for doc in db.swap_cycle_roles.find({"role": {"$in": roles}}, {"_id": 0, "run_id": 1})}
+    return [cycle for cycle in cycles if cycle.get("run_id") in current][:limit]
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """Take or renew a named lease for this worker; False while another worker holds it"""
+    from pymongo.errors import DuplicateKeyError
+    now = datetime.now(timezone.utc)
+    try:
+        await db.job_leases.update_one(
+            {"_id": name, "$or": [{"holder": WORKER_ID}, {"expires_at": {"$lte": now}}]},
+            {"$set": {"holder": WORKER_ID, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def recompute_swap_cycles(force: bool = False) -> Dict[str, int]:
+    """Recompute chain proposals for every role whose active listings changed since the last run"""
+    await match_index.ensure_loaded()
+    by_role: Dict[str, Dict[tuple, Dict[str, dict]]] = defaultdict(dict)
+    for key, bucket in list(match_index.buckets.items()):
+        by_role[key[0]][key] = dict(bucket)
+    
+    previous = {doc["role"]: doc["fingerprint"] async for doc in db.swap_cycle_roles.find({}, {"_id": 0})}
+    computed_at = datetime.now(timezone.utc).isoformat()
+    summary = {}
+    for role, buckets in by_role.items():
+        fingerprint = role_fingerprint(buckets)
+        if not force and previous.get(role) == fingerprint:
+            continue
+        proposals = build_role_cycles(role, buckets, computed_at)
+        if await replace_role_cycles(role, proposals, fingerprint, computed_at):
+            summary[role] = len(proposals)
+    
+    # Roles without any active listing left
+    stale_roles = [role for role in previous if role not in by_role]
+    if stale_roles:
+        await db.swap_cycles.delete_many({"role": {"$in": stale_roles}})
+        await db.swap_cycle_roles.delete_many({"role": {"$in": stale_roles}})
+        summary.update({role: 0 for role in stale_roles})
+    return summary
+
+async def swap_cycle_loop():
+    """Recompute chains periodically on the worker holding SWAP_CYCLE_LEASE"""
+    while True:
+        await asyncio.sleep(SWAP_CYCLE_INTERVAL_SECONDS)
+        try:
+            if not await acquire_lease(SWAP_CYCLE_LEASE, SWAP_CYCLE_LEASE_SECONDS):
+                continue
+            # Listings written on other workers only reach this index on its periodic rebuild
+            await match_index.rebuild()
+            summary = await recompute_swap_cycles()
+            if summary:
+                logger.info(f"Swap cycles recomputed for {len(summary)} roles")
+        except Exception as e:
+            logger.error(f"Swap cycle job failed: {e}")
+
+@api_router.get("/cycles/my")
+async def get_my_cycles(current_user: dict = Depends(get_current_user)):
+    """Multi-party swap chains that include one of the current user's listings"""
+    return await current_cycles({"user_ids": current_user["id"]})
+
+@api_router.get("/listings/{listing_id}/cycles")
+async def get_listing_cycles(listing_id: str):
+    """Multi-party swap chains that include the given listing"""
+    return await current_cycles({"listing_ids": listing_id})
+
 # ============= INVITATION ENDPOINTS =============
 @api_router.post("/invitations")
 async def send_invitation(data: SendInvitation, current_user: dict = Depends(get_current_user)):
@@ -901,7 +2702,7 @@ async def send_invitation(data: SendInvitation, current_user: dict = Depends(get
         raise HTTPException(status_code=429, detail=f"Günlük talep limiti ({INVITATION_LIMIT_PER_DAY}) aşıldı")
     
     # Get listing
-    listing = await db.listings.find_one({"id": data.listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": data.listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
     
@@ -909,8 +2710,7 @@ async def send_invitation(data: SendInvitation, current_user: dict = Depends(get
         raise HTTPException(status_code=400, detail="Kendi ilanınıza talep gönderemezsiniz")
     
     # Check if current user is blocked by admin
-    current_user_data = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
-    if current_user_data and current_user_data.get("blocked"):
+    if current_user.get("blocked"):
         raise HTTPException(status_code=403, detail="Hesabınız engellenmiş. Talep gönderemezsiniz.")
     
     # Check if user is blocked (user-to-user block)
@@ -958,6 +2758,7 @@ async def send_invitation(data: SendInvitation, current_user: dict = Depends(get
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.invitations.insert_one(invitation)
+    platform_counters.add(total_invitations=1)
     
     # Update rate limit
     rate_limit_store[current_user["id"]].append(now)
@@ -972,22 +2773,53 @@ async def send_invitation(data: SendInvitation, current_user: dict = Depends(get
     
     return {"message": "Talep gönderildi", "invitation_id": invitation["id"]}
 
+INVITATION_STATUSES = {"pending", "accepted", "rejected"}
+
 @api_router.get("/invitations")
-async def get_invitations(current_user: dict = Depends(get_current_user)):
-    sent = await db.invitations.find({"sender_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    received = await db.invitations.find({"receiver_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
+async def get_invitations(limit: int = 100, status_filter: Optional[str] = Query(None, alias="status"), box: Optional[str] = None,
+                          sent_cursor: Optional[str] = None, received_cursor: Optional[str] = None,
+                          current_user: dict = Depends(get_current_user)):
+    """Sent and received invitations, newest first.
+    
+    Each list pages independently with sent_next_cursor / received_next_cursor;
+    box=sent|received fetches only one of them.
+    """
+    if status_filter is not None and status_filter not in INVITATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Geçersiz durum.")
+    if box not in (None, "sent", "received"):
+        raise HTTPException(status_code=400, detail="Geçersiz kutu.")
+    limit = clamp_limit(limit, 100)
+    
+    async def page(field: str, cursor: Optional[str]):
+        if box is not None and {"sender_id": "sent", "receiver_id": "received"}[field] != box:
+            return [], None
+        query = {field: current_user["id"]}
+        if status_filter:
+            query["status"] = status_filter
+        return await paginate(db.invitations, query, {"_id": 0}, limit, cursor)
+    
+    (sent, sent_next), (received, received_next) = await asyncio.gather(
+        page("sender_id", sent_cursor), page("receiver_id", received_cursor)
+    )
     
     # Enrich with listing and profile data
-    for inv in sent + received:
-        listing = await db.listings.find_one({"id": inv["listing_id"]}, {"_id": 0})
-        inv["listing"] = listing
-        
-        sender_profile = await db.profiles.find_one({"user_id": inv["sender_id"]}, {"_id": 0})
-        receiver_profile = await db.profiles.find_one({"user_id": inv["receiver_id"]}, {"_id": 0})
-        inv["sender_profile"] = sender_profile
-        inv["receiver_profile"] = receiver_profile
+    invitations = sent + received
+    loader = EnrichmentLoader()
+    listings, profiles = await asyncio.gather(
+        loader.listings(inv["listing_id"] for inv in invitations),
+        loader.profiles(user_id for inv in invitations for user_id in (inv["sender_id"], inv["receiver_id"]))
+    )
+    for inv in invitations:
+        inv["listing"] = listings.get(inv["listing_id"])
+        inv["sender_profile"] = profiles.get(inv["sender_id"])
+        inv["receiver_profile"] = profiles.get(inv["receiver_id"])
     
-    return {"sent": sent, "received": received}
+    return {
+        "sent": sent,
+        "received": received,
+        "sent_next_cursor": sent_next,
+        "received_next_cursor": received_next,
+    }
 
 @api_router.delete("/invitations/{invitation_id}")
 async def delete_invitation(invitation_id: str, current_user: dict = Depends(get_current_user)):
@@ -1001,6 +2833,7 @@ async def delete_invitation(invitation_id: str, current_user: dict = Depends(get
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok.")
     
     await db.invitations.delete_one({"id": invitation_id})
+    platform_counters.add(total_invitations=-1, accepted_invitations=-int(invitation["status"] == "accepted"))
     return {"message": "Becayiş talebi silindi"}
 
 @api_router.post("/invitations/respond")
@@ -1030,9 +2863,12 @@ async def respond_invitation(data: RespondInvitation, current_user: dict = Depen
             "id": str(uuid.uuid4()),
             "participants": [invitation["sender_id"], invitation["receiver_id"]],
             "invitation_id": data.invitation_id,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "unread_count": {}
         }
+        conversation["last_activity_at"] = conversation["created_at"]
         await db.conversations.insert_one(conversation)
+        platform_counters.add(accepted_invitations=1, total_conversations=1)
         
         # Send notification to sender
         await create_notification(
@@ -1056,62 +2892,84 @@ async def respond_invitation(data: RespondInvitation, current_user: dict = Depen
 
 # ============= CHAT ENDPOINTS =============
 @api_router.get("/conversations")
-async def get_conversations(current_user: dict = Depends(get_current_user)):
-    conversations = await db.conversations.find(
-        {"participants": current_user["id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+async def get_conversations(response: Response, limit: int = 100, cursor: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Inbox, most recently active first; summaries are stored on the conversation"""
+    conversations, next_cursor = await paginate(
+        db.conversations, {"participants": current_user["id"]}, {"_id": 0}, clamp_limit(limit, 100), cursor,
+        sort_field="last_activity_at"
+    )
+    set_next_cursor(response, next_cursor)
     
-    # Enrich with participant profiles and last message
-    for conv in conversations:
-        other_user_id = [p for p in conv["participants"] if p != current_user["id"]][0]
-        other_profile = await db.profiles.find_one({"user_id": other_user_id}, {"_id": 0})
-        
-        # Get last message
-        last_message = await db.messages.find(
-            {"conversation_id": conv["id"]},
-            {"_id": 0}
-        ).sort("created_at", -1).limit(1).to_list(1)
-        
-        conv["other_user"] = other_profile
-        conv["last_message"] = last_message[0] if last_message else None
+    # Enrich with participant profiles
+    other_ids = [[p for p in conv["participants"] if p != current_user["id"]][0] for conv in conversations]
+    profiles = await EnrichmentLoader().profiles(other_ids)
+    for conv, other_user_id in zip(conversations, other_ids):
+        conv["other_user"] = profiles[other_user_id]
+        conv["last_message"] = conv.get("last_message")
+        conv["unread_count"] = conv.get("unread_count", {}).get(current_user["id"], 0)
     
     return conversations
 
 @api_router.get("/conversations/{conversation_id}/messages")
-async def get_messages(conversation_id: str, current_user: dict = Depends(get_current_user)):
+async def get_messages(conversation_id: str, response: Response, limit: int = 1000, cursor: Optional[str] = None,
+                       before: Optional[str] = None, after: Optional[str] = None,
+                       current_user: dict = Depends(get_current_user)):
+    """Messages of a conversation in chronological order.
+    
+    Without parameters returns the newest page plus participant contact info.
+    ?after=<message_id> returns only messages newer than that one (delta sync);
+    ?before=<cursor> pages older history using the returned next_cursor.
+    """
     # Verify access
-    conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0})
+    conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0, "participants": 1})
     if not conversation:
         raise HTTPException(status_code=404, detail="Konuşma bulunamadı.")
     
     if current_user["id"] not in conversation["participants"]:
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok.")
     
-    messages = await db.messages.find(
-        {"conversation_id": conversation_id},
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(1000)
+    if after:
+        anchor = await db.messages.find_one(
+            {"id": after, "conversation_id": conversation_id}, {"_id": 0, "id": 1, "created_at": 1}
+        )
+        if not anchor:
+            raise HTTPException(status_code=404, detail="Mesaj bulunamadı.")
+        # Oldest first from the anchor; next_cursor continues forward
+        messages, next_cursor = await paginate(
+            db.messages, {"conversation_id": conversation_id}, {"_id": 0}, clamp_limit(limit, 1000),
+            encode_cursor(anchor), descending=False
+        )
+        set_next_cursor(response, next_cursor)
+        return {"messages": messages, "next_cursor": next_cursor}
+    
+    # Newest page first (cursor walks back in time), returned in chronological order
+    messages, next_cursor = await paginate(
+        db.messages, {"conversation_id": conversation_id}, {"_id": 0}, clamp_limit(limit, 1000), before or cursor
+    )
+    messages.reverse()
+    set_next_cursor(response, next_cursor)
+    
+    if before:
+        return {"messages": messages, "next_cursor": next_cursor}
     
     # Get contact info (phone, email) for both users
-    user1 = await db.users.find_one({"id": conversation["participants"][0]}, {"_id": 0, "phone": 1, "email": 1})
-    user2 = await db.users.find_one({"id": conversation["participants"][1]}, {"_id": 0, "phone": 1, "email": 1})
-    profile1 = await db.profiles.find_one({"user_id": conversation["participants"][0]}, {"_id": 0})
-    profile2 = await db.profiles.find_one({"user_id": conversation["participants"][1]}, {"_id": 0})
+    loader = EnrichmentLoader()
+    users = await loader.users(conversation["participants"], {"phone": 1, "email": 1})
+    profiles = await loader.profiles(conversation["participants"])
     
     return {
         "messages": messages,
+        "next_cursor": next_cursor,
         "participants": [
-            {**profile1, "phone": user1["phone"], "email": user1["email"]},
-            {**profile2, "phone": user2["phone"], "email": user2["email"]}
+            {**profiles[user_id], "phone": users[user_id]["phone"], "email": users[user_id]["email"]}
+            for user_id in conversation["participants"]
         ]
     }
 
 @api_router.post("/messages")
 async def send_message(data: SendMessage, current_user: dict = Depends(get_current_user)):
     # Check if current user is blocked by admin
-    current_user_data = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
-    if current_user_data and current_user_data.get("blocked"):
+    if current_user.get("blocked"):
         raise HTTPException(status_code=403, detail="Hesabınız engellenmiş. Mesaj gönderemezsiniz.")
     
     # Verify access
@@ -1139,15 +2997,13 @@ async def send_message(data: SendMessage, current_user: dict = Depends(get_curre
         "read": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.messages.insert_one(message)
+    await write_behind.insert("messages", message)
+    platform_counters.add(total_messages=1)
+    await record_conversation_message(data.conversation_id, other_user_id, message)
+    typing_throttle.clear(data.conversation_id, current_user["id"])
     
     # Send notification
-    await create_notification(
-        other_user_id,
-        "Yeni Mesaj",
-        "Size yeni bir mesaj geldi.",
-        "message"
-    )
+    await notify_new_message(other_user_id, data.conversation_id)
     
     # Remove MongoDB _id before returning
     message.pop("_id", None)
@@ -1171,10 +3027,12 @@ async def delete_conversation(conversation_id: str, current_user: dict = Depends
     display_name = current_profile.get("display_name", "Bir kullanıcı") if current_profile else "Bir kullanıcı"
     
     # Delete all messages in the conversation
-    await db.messages.delete_many({"conversation_id": conversation_id})
+    deleted = await db.messages.delete_many({"conversation_id": conversation_id})
     
     # Delete the conversation
     await db.conversations.delete_one({"id": conversation_id})
+    platform_counters.add(total_messages=-deleted.deleted_count, total_conversations=-1)
+    await ws_manager.publish_control("conversations_deleted", {"conversation_ids": [conversation_id]})
     
     # Send notification to other user
     await create_notification(
@@ -1187,21 +3045,110 @@ async def delete_conversation(conversation_id: str, current_user: dict = Depends
     return {"message": "Konuşma silindi."}
 
 # ============= NOTIFICATION ENDPOINTS =============
+# Admin broadcasts are stored once in `broadcasts` and merged into each user's
+# notifications at read time. Per-user read/dismiss state lives in `broadcast_receipts`.
+async def visible_broadcasts(user: dict, limit: int, cursor: Optional[str]):
+    """Broadcasts sent after the user registered and not dismissed, as notification documents.
+    
+    Receipts are read only for the broadcasts on each page. Dismissed broadcasts, and
+    migrated ones (audience "receipts") the user never received, are filtered out
+    afterwards, reading further pages until limit is filled.
+    """
+    query = {"created_at": {"$gte": user.get("created_at") or ""}}
+    visible = []
+    while True:
+        broadcasts, next_cursor = await paginate(db.broadcasts, query, {"_id": 0, "created_by": 0}, limit, cursor)
+        receipts = {
+            r["broadcast_id"]: r
+            async for r in db.broadcast_receipts.find(
+                {"user_id": user["id"], "broadcast_id": {"$in": [b["id"] for b in broadcasts]}}, {"_id": 0}
+            )
+        }
+        for i, broadcast in enumerate(broadcasts):
+            receipt = receipts.get(broadcast["id"])
+            if (receipt or {}).get("dismissed") or (broadcast.get("audience") == "receipts" and receipt is None):
+                continue
+            broadcast["user_id"] = user["id"]
+            broadcast["read"] = (receipt or {}).get("read", False)
+            visible.append(broadcast)
+            if len(visible) == limit:
+                more = i + 1 < len(broadcasts) or next_cursor
+                return visible, encode_cursor(broadcast) if more else None
+        if not next_cursor:
+            return visible, None
+        cursor = next_cursor
+
+async def set_broadcast_receipt(broadcast_id: str, user_id: str, **fields) -> bool:
+    """Record read/dismiss state for a broadcast; False if broadcast_id is not a broadcast"""
+    broadcast = await db.broadcasts.find_one({"id": broadcast_id}, {"_id": 0, "audience": 1})
+    if not broadcast:
+        return False
+    # A receipt is what makes a migrated broadcast visible, so never create one for it
+    await db.broadcast_receipts.update_one(
+        {"broadcast_id": broadcast_id, "user_id": user_id},
+        {"$set": {**fields, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=broadcast.get("audience") != "receipts"
+    )
+    return True
+
+async def migrate_legacy_broadcasts() -> int:
+    """Convert per-user admin_broadcast notifications into single broadcasts.
+
+    Only users who still hold a copy see the migrated broadcast (audience "receipts"):
+    each copy becomes a receipt carrying its read flag. Users without a copy (deleted,
+    or never sent one) get nothing written.
+    """
+    from pymongo import UpdateOne
+    groups = await db.notifications.aggregate([
+        {"$match": {"type": "admin_broadcast"}},
+        {"$group": {"_id": {"title": "$title", "message": "$message"}, "created_at": {"$min": "$created_at"}}},
+    ]).to_list(None)
+    for group in groups:
+        legacy_query = {"type": "admin_broadcast", **group["_id"]}
+        broadcast = {
+            "id": str(uuid.uuid4()),
+            "title": group["_id"]["title"],
+            "message": group["_id"]["message"],
+            "type": "admin_broadcast",
+            "created_by": "migration",
+            "created_at": group["created_at"],
+            "audience": "receipts"
+        }
+        receipts = []
+        async for legacy in db.notifications.find(legacy_query, {"_id": 0, "user_id": 1, "read": 1}):
+            receipts.append(UpdateOne(
+                {"broadcast_id": broadcast["id"], "user_id": legacy["user_id"]},
+                {"$set": {"read": bool(legacy.get("read")), "updated_at": broadcast["created_at"]}}, upsert=True
+            ))
+        await db.broadcasts.insert_one(broadcast)
+        for start in range(0, len(receipts), 1000):
+            await db.broadcast_receipts.bulk_write(receipts[start:start + 1000], ordered=False)
+        await db.notifications.delete_many(legacy_query)
+    return len(groups)
+
 @api_router.get("/notifications")
-async def get_notifications(current_user: dict = Depends(get_current_user)):
-    notifications = await db.notifications.find(
-        {"user_id": current_user["id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).limit(50).to_list(50)
+async def get_notifications(response: Response, limit: int = 50, cursor: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    limit = clamp_limit(limit, 100)
+    personal, personal_next = await paginate(
+        db.notifications, {"user_id": current_user["id"]}, {"_id": 0}, limit, cursor
+    )
+    broadcasts, broadcasts_next = await visible_broadcasts(current_user, limit, cursor)
+    
+    merged = sorted(personal + broadcasts, key=lambda n: (n.get("created_at") or "", n["id"]), reverse=True)
+    notifications = merged[:limit]
+    if notifications and (len(merged) > limit or personal_next or broadcasts_next):
+        set_next_cursor(response, encode_cursor(notifications[-1]))
     
     return notifications
 
 @api_router.post("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: dict = Depends(get_current_user)):
-    await db.notifications.update_one(
+    result = await db.notifications.update_one(
         {"id": notification_id, "user_id": current_user["id"]},
         {"$set": {"read": True}}
     )
+    if result.matched_count == 0:
+        await set_broadcast_receipt(notification_id, current_user["id"], read=True)
     return {"message": "Bildirim okundu olarak işaretlendi."}
 
 # ============= BLOCK/REPORT ENDPOINTS =============
@@ -1226,6 +3173,7 @@ async def block_user(data: BlockUser, current_user: dict = Depends(get_current_u
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.blocks.insert_one(block)
+    await ws_manager.publish_control("block_changed", {"blocker_id": current_user["id"], "blocked_id": data.blocked_user_id})
     
     return {"message": "Kullanıcı engellendi."}
 
@@ -1250,6 +3198,7 @@ async def unblock_user(blocked_user_id: str, current_user: dict = Depends(get_cu
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Engel bulunamadı.")
+    await ws_manager.publish_control("block_changed", {"blocker_id": current_user["id"], "blocked_id": blocked_user_id})
     
     return {"message": "Engel kaldırıldı"}
 
@@ -1278,7 +3227,7 @@ async def admin_login(username: str, password: str):
             await db.admins.insert_one({
                 "id": str(uuid.uuid4()),
                 "username": ADMIN_USERNAME,
-                "password_hash": get_password_hash(ADMIN_PASSWORD),
+                "password_hash": await get_password_hash(ADMIN_PASSWORD),
                 "display_name": "Becayiş Admin",
                 "role": "admin",  # Default to regular admin, can be promoted later
                 "avatar_url": None,
@@ -1305,7 +3254,7 @@ async def admin_login(username: str, password: str):
     
     # Check admins collection
     admin = await db.admins.find_one({"username": username}, {"_id": 0})
-    if admin and verify_password(password, admin.get("password_hash", "")):
+    if admin and await verify_password(password, admin.get("password_hash", "")):
         access_token = create_access_token(data={
             "sub": "admin", 
             "is_admin": True, 
@@ -1322,26 +3271,31 @@ async def admin_login(username: str, password: str):
     raise HTTPException(status_code=401, detail="Kullanıcı adı veya şifre hatalı.")
 
 @api_router.get("/admin/users")
-async def admin_get_users(admin = Depends(verify_admin)):
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0, "tc_hash": 0, "registry_hash": 0}).to_list(1000)
-    
-    # Enrich with profile data
-    for user in users:
-        profile = await db.profiles.find_one({"user_id": user["id"]}, {"_id": 0})
-        user["profile"] = profile
-    
-    return users
+async def admin_get_users(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                          blocked: Optional[bool] = None, q: Optional[str] = None, admin = Depends(verify_admin)):
+    query = {}
+    if blocked is not None:
+        query["blocked"] = True if blocked else {"$ne": True}
+    if q:
+        # Anchored prefix on the folded copy of the email, served by its index
+        query["email_search"] = {"$regex": "^" + re.escape(fold_email(q))}
+    return await admin_list(
+        db.users, response, query, {"_id": 0, **{field: 0 for field in ADMIN_HIDDEN_USER_FIELDS}},
+        [profile_join("profile", "id")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.get("/admin/listings")
-async def admin_get_listings(admin = Depends(verify_admin)):
-    listings = await db.listings.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Enrich with profile data
-    for listing in listings:
-        profile = await db.profiles.find_one({"user_id": listing["user_id"]}, {"_id": 0})
-        listing["profile"] = profile
-    
-    return listings
+async def admin_get_listings(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                             status_filter: Optional[str] = Query(None, alias="status"), user_id: Optional[str] = None,
+                             admin = Depends(verify_admin)):
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    if user_id:
+        query["user_id"] = user_id
+    return await admin_list(
+        db.listings, response, query, LISTING_PROJECTION, [profile_join("profile")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.put("/admin/users/{user_id}/block")
 async def admin_block_user(user_id: str, admin = Depends(verify_admin)):
@@ -1352,6 +3306,7 @@ async def admin_block_user(user_id: str, admin = Depends(verify_admin)):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    await invalidate_user(user_id)
     
     return {"message": "Kullanıcı engellendi."}
 
@@ -1364,59 +3319,51 @@ async def admin_unblock_user(user_id: str, admin = Depends(verify_admin)):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    await invalidate_user(user_id)
     
     return {"message": "Kullanıcı engeli kaldırıldı."}
 
 @api_router.delete("/admin/listings/{listing_id}")
 async def admin_delete_listing(listing_id: str, admin = Depends(verify_admin)):
-    result = await db.listings.delete_one({"id": listing_id})
+    listing = await db.listings.find_one_and_delete({"id": listing_id}, {"_id": 0, "status": 1})
     
-    if result.deleted_count == 0:
+    if listing is None:
         raise HTTPException(status_code=404, detail="İlan bulunamadı.")
+    match_index.remove(listing_id)
+    platform_counters.add(total_listings=-1, active_listings=-int(listing.get("status") == "active"))
     
     return {"message": "İlan silindi."}
 
 @api_router.get("/admin/reports")
-async def admin_get_reports(admin = Depends(verify_admin)):
-    blocks = await db.blocks.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Enrich with profile data
-    for block in blocks:
-        blocker = await db.profiles.find_one({"user_id": block["blocker_id"]}, {"_id": 0})
-        blocked = await db.profiles.find_one({"user_id": block["blocked_id"]}, {"_id": 0})
-        block["blocker_profile"] = blocker
-        block["blocked_profile"] = blocked
-    
-    return blocks
+async def admin_get_reports(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                            admin = Depends(verify_admin)):
+    return await admin_list(
+        db.blocks, response, {}, {"_id": 0},
+        [profile_join("blocker_profile", "blocker_id"), profile_join("blocked_profile", "blocked_id")],
+        clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.get("/admin/stats")
 async def admin_get_stats(admin = Depends(verify_admin)):
-    total_users = await db.users.count_documents({})
-    total_listings = await db.listings.count_documents({})
-    active_listings = await db.listings.count_documents({"status": "active"})
-    total_invitations = await db.invitations.count_documents({})
-    accepted_invitations = await db.invitations.count_documents({"status": "accepted"})
-    total_conversations = await db.conversations.count_documents({})
-    total_messages = await db.messages.count_documents({})
-    pending_deletions = await db.deletion_requests.count_documents({"status": "pending"})
-    pending_profile_updates = await db.profile_update_requests.count_documents({"status": "pending"})  # YENİ
-    
+    """Platform totals from the materialized counters document"""
+    return await platform_counters.read()
+
+@api_router.get("/admin/metrics")
+async def admin_get_metrics(admin = Depends(verify_admin)):
+    """Runtime metrics of this worker"""
     return {
-        "total_users": total_users,
-        "total_listings": total_listings,
-        "active_listings": active_listings,
-        "total_invitations": total_invitations,
-        "accepted_invitations": accepted_invitations,
-        "total_conversations": total_conversations,
-        "total_messages": total_messages,
-        "pending_deletions": pending_deletions,
-        "pending_profile_updates": pending_profile_updates  # YENİ
+        "worker_id": WORKER_ID,
+        "password_hashing": password_hasher.metrics(),
+        "write_behind": write_behind.metrics(),
+        "typing": typing_throttle.metrics(),
+        "websocket": ws_manager.metrics(),
     }
 
 @api_router.delete("/admin/stats/accepted-invitations")
 async def reset_accepted_invitations_count(admin = Depends(verify_admin)):
     """Reset accepted invitations by deleting all accepted invitations"""
     result = await db.invitations.delete_many({"status": "accepted"})
+    platform_counters.add(total_invitations=-result.deleted_count, accepted_invitations=-result.deleted_count)
     return {"message": f"{result.deleted_count} kabul edilmiş talep silindi.", "deleted_count": result.deleted_count}
 
 class BulkNotification(BaseModel):
@@ -1425,40 +3372,38 @@ class BulkNotification(BaseModel):
 
 @api_router.post("/admin/notifications/bulk")
 async def send_bulk_notification(data: BulkNotification, admin = Depends(verify_admin)):
-    """Send notification to all users"""
-    users = await db.users.find({}, {"_id": 0, "id": 1}).to_list(None)
-    
-    notifications = []
-    for user in users:
-        notification = {
-            "id": str(uuid.uuid4()),
-            "user_id": user["id"],
-            "title": data.title,
-            "message": data.message,
-            "type": "admin_broadcast",
-            "read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        notifications.append(notification)
-    
-    if notifications:
-        await db.notifications.insert_many(notifications)
+    """Send notification to all users (stored once, merged into notifications on read)"""
+    broadcast = {
+        "id": str(uuid.uuid4()),
+        "title": data.title,
+        "message": data.message,
+        "type": "admin_broadcast",
+        "created_by": admin.get("username", "admin"),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.broadcasts.insert_one(broadcast)
     
-    return {"message": f"{len(notifications)} kullanıcıya bildirim gönderildi.", "count": len(notifications)}
+    user_count = await db.users.estimated_document_count()
+    return {"message": f"{user_count} kullanıcıya bildirim gönderildi.", "count": user_count, "broadcast_id": broadcast["id"]}
 
 @api_router.get("/admin/notifications")
-async def get_admin_notifications(admin = Depends(verify_admin)):
+async def get_admin_notifications(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, admin = Depends(verify_admin)):
     """Get all admin broadcast notifications"""
-    notifications = await db.notifications.find(
-        {"type": "admin_broadcast"}, 
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    notifications, next_cursor = await paginate(
+        db.broadcasts, {}, {"_id": 0}, clamp_limit(limit, ADMIN_PAGE_SIZE), cursor
+    )
+    set_next_cursor(response, next_cursor)
     return notifications
 
 @api_router.delete("/admin/notifications/{notification_id}")
 async def delete_admin_notification(notification_id: str, admin = Depends(verify_admin)):
     """Delete a specific admin notification from all users"""
-    # Find the notification to get its details
+    result = await db.broadcasts.delete_one({"id": notification_id})
+    if result.deleted_count:
+        await db.broadcast_receipts.delete_many({"broadcast_id": notification_id})
+        return {"message": "Bildirim silindi", "deleted_count": 1}
+    
+    # Legacy broadcasts stored as one notification per user
     notification = await db.notifications.find_one({"id": notification_id}, {"_id": 0})
     if not notification:
         raise HTTPException(status_code=404, detail="Bildirim bulunamadı.")
@@ -1473,31 +3418,22 @@ async def delete_admin_notification(notification_id: str, admin = Depends(verify
     return {"message": f"Bildirim silindi ({result.deleted_count} kayıt)", "deleted_count": result.deleted_count}
 
 @api_router.get("/admin/deletion-requests")
-async def admin_get_deletion_requests(admin = Depends(verify_admin)):
-    requests = await db.deletion_requests.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Enrich with listing and user data
-    for req in requests:
-        listing = await db.listings.find_one({"id": req["listing_id"]}, {"_id": 0})
-        profile = await db.profiles.find_one({"user_id": req["user_id"]}, {"_id": 0})
-        req["listing"] = listing
-        req["user_profile"] = profile
-    
-    return requests
+async def admin_get_deletion_requests(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                                      status_filter: Optional[str] = Query(None, alias="status"), admin = Depends(verify_admin)):
+    return await admin_list(
+        db.deletion_requests, response, {"status": status_filter} if status_filter else {}, {"_id": 0},
+        [("listing", "listings", "listing_id", "id", ("search_text", "search_grams")), profile_join("user_profile")],
+        clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.get("/admin/profile-update-requests")
-async def get_profile_update_requests(admin = Depends(verify_admin)):
+async def get_profile_update_requests(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                                      status_filter: Optional[str] = Query(None, alias="status"), admin = Depends(verify_admin)):
     """Get all profile update requests"""
-    requests = await db.profile_update_requests.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Enrich with user and profile data
-    for req in requests:
-        user = await db.users.find_one({"id": req["user_id"]}, {"_id": 0, "password_hash": 0})
-        profile = await db.profiles.find_one({"user_id": req["user_id"]}, {"_id": 0})
-        req["user"] = user
-        req["current_profile"] = profile
-    
-    return requests
+    return await admin_list(
+        db.profile_update_requests, response, {"status": status_filter} if status_filter else {}, {"_id": 0},
+        [user_join("user"), profile_join("current_profile")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.post("/admin/profile-update-requests/{request_id}/approve")
 async def approve_profile_update(request_id: str, admin = Depends(verify_admin)):
@@ -1515,8 +3451,10 @@ async def approve_profile_update(request_id: str, admin = Depends(verify_admin))
         {"user_id": request["user_id"]},
         {"$set": update_data, "$inc": {"update_request_count": 1}}
     )
+    await ws_manager.publish_control("profile_changed", {"user_id": request["user_id"]})
     
     # Update request status
+    platform_counters.add(pending_profile_updates=-1)
     await db.profile_update_requests.update_one(
         {"id": request_id},
         {"$set": {
@@ -1552,6 +3490,7 @@ async def reject_profile_update(request_id: str, data: RejectProfileUpdateReques
     reason = data.reason if data else None
     
     # Update request status
+    platform_counters.add(pending_profile_updates=-1)
     await db.profile_update_requests.update_one(
         {"id": request_id},
         {"$set": {
@@ -1584,27 +3523,23 @@ async def delete_profile_update_request(request_id: str, admin = Depends(verify_
         raise HTTPException(status_code=404, detail="Güncelleme talebi bulunamadı.")
     
     await db.profile_update_requests.delete_one({"id": request_id})
+    platform_counters.add(pending_profile_updates=-int(request.get("status") == "pending"))
     return {"message": "Güncelleme talebi temizlendi."}
 
 # ============= ADMIN LISTING APPROVAL =============
 @api_router.get("/admin/pending-listings")
-async def get_pending_listings(admin = Depends(verify_admin)):
+async def get_pending_listings(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                               admin = Depends(verify_admin)):
     """Get all listings pending approval"""
-    listings = await db.listings.find({"status": "pending_approval"}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Enrich with user profile data
-    for listing in listings:
-        profile = await db.profiles.find_one({"user_id": listing["user_id"]}, {"_id": 0})
-        user = await db.users.find_one({"id": listing["user_id"]}, {"_id": 0, "password_hash": 0})
-        listing["user_profile"] = profile
-        listing["user"] = user
-    
-    return listings
+    return await admin_list(
+        db.listings, response, {"status": "pending_approval"}, LISTING_PROJECTION,
+        [profile_join("user_profile"), user_join("user")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.post("/admin/listings/{listing_id}/approve")
 async def approve_listing(listing_id: str, admin = Depends(verify_admin)):
     """Approve a pending listing"""
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı.")
     
@@ -1615,6 +3550,8 @@ async def approve_listing(listing_id: str, admin = Depends(verify_admin)):
         {"id": listing_id},
         {"$set": {"status": "active", "approved_at": datetime.now(timezone.utc).isoformat()}}
     )
+    platform_counters.add(active_listings=1)
+    match_index.upsert({**listing, "status": "active"})
     
     # Notify user
     await create_notification(
@@ -1632,7 +3569,7 @@ class RejectListingRequest(BaseModel):
 @api_router.post("/admin/listings/{listing_id}/reject")
 async def reject_listing(listing_id: str, data: RejectListingRequest = None, admin = Depends(verify_admin)):
     """Reject a pending listing"""
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one({"id": listing_id}, LISTING_PROJECTION)
     if not listing:
         raise HTTPException(status_code=404, detail="İlan bulunamadı.")
     
@@ -1692,18 +3629,19 @@ async def admin_send_message_to_user(user_id: str, data: AdminSendMessageToUser,
     return {"message": "Mesaj gönderildi", "notification_id": notification["id"]}
 
 @api_router.get("/admin/user-messages")
-async def get_admin_user_messages(admin = Depends(verify_admin)):
+async def get_admin_user_messages(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                                  user_id: Optional[str] = None, admin = Depends(verify_admin)):
     """Get all admin messages sent to individual users"""
-    messages = await db.notifications.find(
-        {"type": "admin_message"}, 
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    query = {"type": "admin_message"}
+    if user_id:
+        query["user_id"] = user_id
+    messages = await admin_list(
+        db.notifications, response, query, {"_id": 0},
+        [profile_join("user_profile"), user_join("user")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
     
-    # Enrich with user profile data
     for msg in messages:
-        profile = await db.profiles.find_one({"user_id": msg["user_id"]}, {"_id": 0})
-        user = await db.users.find_one({"id": msg["user_id"]}, {"_id": 0, "email": 1, "first_name": 1, "last_name": 1})
-        msg["user_profile"] = profile
+        user = msg.pop("user")
         msg["user_email"] = user.get("email") if user else None
         msg["user_name"] = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else None
     
@@ -1727,9 +3665,13 @@ async def admin_delete_user(user_id: str, admin = Depends(verify_admin)):
     
     # Delete user and all related data
     await db.users.delete_one({"id": user_id})
+    await invalidate_user(user_id)
     await db.profiles.delete_many({"user_id": user_id})
     await db.listings.delete_many({"user_id": user_id})
+    match_index.remove_user(user_id)
     await db.notifications.delete_many({"user_id": user_id})
+    await db.broadcast_receipts.delete_many({"user_id": user_id})
+    platform_counters.schedule_reconcile()
     
     # TODO: Send email notification to user
     # send_email(user["email"], "Hesabınız Silindi", "...")
@@ -1746,7 +3688,11 @@ async def admin_approve_deletion(request_id: str, admin = Depends(verify_admin))
         raise HTTPException(status_code=400, detail="Bu istek zaten işlenmiş.")
     
     # Delete the listing
-    await db.listings.delete_one({"id": request["listing_id"]})
+    listing = await db.listings.find_one_and_delete({"id": request["listing_id"]}, {"_id": 0, "status": 1})
+    match_index.remove(request["listing_id"])
+    if listing is not None:
+        platform_counters.add(total_listings=-1, active_listings=-int(listing.get("status") == "active"))
+    platform_counters.add(pending_deletions=-1)
     
     # Update request status
     await db.deletion_requests.update_one(
@@ -1777,6 +3723,7 @@ async def admin_reject_deletion(request_id: str, admin = Depends(verify_admin)):
         raise HTTPException(status_code=400, detail="Bu istek zaten işlenmiş.")
     
     # Update request status
+    platform_counters.add(pending_deletions=-1)
     await db.deletion_requests.update_one(
         {"id": request_id},
         {"$set": {
@@ -1803,22 +3750,18 @@ async def admin_delete_deletion_request(request_id: str, admin = Depends(verify_
         raise HTTPException(status_code=404, detail="Silme isteği bulunamadı.")
     
     await db.deletion_requests.delete_one({"id": request_id})
+    platform_counters.add(pending_deletions=-int(request.get("status") == "pending"))
     return {"message": "Silme isteği temizlendi."}
 
 # ============= ADMIN ACCOUNT DELETION REQUESTS =============
 @api_router.get("/admin/account-deletion-requests")
-async def get_account_deletion_requests(admin = Depends(verify_admin)):
+async def get_account_deletion_requests(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "-created_at",
+                                        status_filter: Optional[str] = Query(None, alias="status"), admin = Depends(verify_admin)):
     """Get all account deletion requests"""
-    requests = await db.account_deletion_requests.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Attach user info
-    for req in requests:
-        user = await db.users.find_one({"id": req["user_id"]}, {"_id": 0})
-        profile = await db.profiles.find_one({"user_id": req["user_id"]}, {"_id": 0})
-        req["user"] = user
-        req["profile"] = profile
-    
-    return requests
+    return await admin_list(
+        db.account_deletion_requests, response, {"status": status_filter} if status_filter else {}, {"_id": 0},
+        [user_join("user"), profile_join("profile")], clamp_limit(limit, ADMIN_PAGE_SIZE), cursor, sort
+    )
 
 @api_router.post("/admin/account-deletion-requests/{request_id}/approve")
 async def approve_account_deletion(request_id: str, admin = Depends(verify_admin)):
@@ -1834,13 +3777,18 @@ async def approve_account_deletion(request_id: str, admin = Depends(verify_admin
     
     # Delete all user data
     await db.users.delete_one({"id": user_id})
+    await invalidate_user(user_id)
     await db.profiles.delete_many({"user_id": user_id})
     await db.listings.delete_many({"user_id": user_id})
+    match_index.remove_user(user_id)
     await db.notifications.delete_many({"user_id": user_id})
+    await db.broadcast_receipts.delete_many({"user_id": user_id})
     await db.invitations.delete_many({"$or": [{"sender_id": user_id}, {"receiver_id": user_id}]})
     await db.conversations.delete_many({"participants": user_id})
+    await ws_manager.publish_control("conversations_deleted", {"participant": user_id})
     await db.messages.delete_many({"sender_id": user_id})
     await db.deletion_requests.delete_many({"user_id": user_id})
+    platform_counters.schedule_reconcile()
     
     # Update request status
     await db.account_deletion_requests.update_one(
@@ -1956,7 +3904,7 @@ async def create_admin(data: CreateAdmin, admin = Depends(verify_admin)):
     new_admin = {
         "id": str(uuid.uuid4()),
         "username": username,
-        "password_hash": get_password_hash(data.password),
+        "password_hash": await get_password_hash(data.password),
         "display_name": data.display_name or username,
         "role": new_role,
         "avatar_url": None,
@@ -1995,7 +3943,7 @@ async def update_admin_password(admin_id: str, data: UpdateAdminPassword, admin
     
     await db.admins.update_one(
         {"id": admin_id},
-        {"$set": {"password_hash": get_password_hash(data.new_password)}}
+        {"$set": {"password_hash": await get_password_hash(data.new_password)}}
     )
     
     return {"message": "Admin şifresi güncellendi."}
@@ -2062,7 +4010,7 @@ async def transfer_main_admin(data: TransferMainAdmin, admin = Depends(verify_ad
         raise HTTPException(status_code=403, detail="Sadece ana admin bu işlemi yapabilir.")
     
     # Verify password - check database password hash
-    if not current_admin or not verify_password(data.password, current_admin.get("password_hash", "")):
+    if not current_admin or not await verify_password(data.password, current_admin.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Şifre hatalı.")
     
     # Get target admin
@@ -2179,7 +4127,7 @@ async def delete_notification(notification_id: str, current_user: dict = Depends
         "user_id": current_user["id"]
     })
     
-    if result.deleted_count == 0:
+    if result.deleted_count == 0 and not await set_broadcast_receipt(notification_id, current_user["id"], dismissed=True):
         raise HTTPException(status_code=404, detail="Bildirim bulunamadı.")
     
     return {"message": "Bildirim silindi"}
@@ -2187,79 +4135,82 @@ async def delete_notification(notification_id: str, current_user: dict = Depends
 # ============= LISTING STATISTICS ENDPOINTS =============
 @api_router.get("/stats/top-positions")
 async def get_top_positions(limit: int = 10):
-    """Get most listed positions with counts"""
-    pipeline = [
-        {"$match": {"status": "active"}},
-        {"$group": {"_id": "$role", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": limit}
+    """Get most listed positions with counts.
+    
+    Served from this worker's match index and never rebuilt here; counts lag writes made
+    on other workers by up to MATCH_INDEX_REFRESH_SECONDS and are empty until the first build.
+    """
+    return [
+        {"position": role, "count": count}
+        for role, count in match_index.leaderboards["role"].top(clamp_limit(limit, LEADERBOARD_MAX_LIMIT))
     ]
-    results = await db.listings.aggregate(pipeline).to_list(limit)
-    return [{"position": r["_id"], "count": r["count"]} for r in results if r["_id"]]
 
 @api_router.get("/stats/top-institutions")
 async def get_top_institutions(limit: int = 10):
-    """Get most listed institutions with counts"""
-    pipeline = [
-        {"$match": {"status": "active"}},
-        {"$group": {"_id": "$institution", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": limit}
+    """Get most listed institutions with counts.
+    
+    Served from this worker's match index and never rebuilt here; counts lag writes made
+    on other workers by up to MATCH_INDEX_REFRESH_SECONDS and are empty until the first build.
+    """
+    return [
+        {"institution": institution, "count": count}
+        for institution, count in match_index.leaderboards["institution"].top(clamp_limit(limit, LEADERBOARD_MAX_LIMIT))
     ]
-    results = await db.listings.aggregate(pipeline).to_list(limit)
-    return [{"institution": r["_id"], "count": r["count"]} for r in results if r["_id"]]
 
 # ============= UTILITY ENDPOINTS =============
 @api_router.get("/utility/institutions")
-async def get_institutions_list():
+async def get_institutions_list(request: Request):
     """Return Turkish public institutions from constants"""
-    return INSTITUTIONS
+    return INSTITUTIONS_JSON.response(request)
 
 @api_router.get("/institutions")
-async def get_institutions_alt():
+async def get_institutions_alt(request: Request):
     """Return Turkish public institutions (alternative endpoint)"""
-    return INSTITUTIONS
+    return INSTITUTIONS_JSON.response(request)
 
 @api_router.get("/institutions/search")
-async def search_institutions(q: str = ""):
-    """Search institutions by query"""
-    if not q or len(q) < 2:
-        return INSTITUTIONS[:20]  # Return first 20 if no query
-    
-    q_lower = q.lower()
-    results = [inst for inst in INSTITUTIONS if q_lower in inst.lower()]
-    return results[:20]  # Limit to 20 results
+async def search_institutions(q: str = "", limit: int = 20):
+    """Autocomplete institutions (Turkish case and diacritic insensitive)"""
+    limit = clamp_limit(limit, AUTOCOMPLETE_MAX_LIMIT)
+    if len(q.strip()) < 2:
+        return INSTITUTIONS[:limit]  # First entries if no query
+    return INSTITUTION_AUTOCOMPLETE.search(q, limit)
 
 @api_router.get("/utility/positions")
-async def get_positions_list():
+async def get_positions_list(request: Request):
     """Return common public sector positions from constants"""
-    return sorted(POSITIONS)
+    return SORTED_POSITIONS_JSON.response(request)
 
 @api_router.get("/positions/search")
-async def search_positions(q: str = ""):
-    """Search positions by query"""
-    if not q or len(q) < 2:
-        return sorted(POSITIONS)[:20]  # Return first 20 if no query
-    
-    q_lower = q.lower()
-    results = [pos for pos in POSITIONS if q_lower in pos.lower()]
-    return sorted(results)[:20]  # Limit to 20 results
+async def search_positions(q: str = "", limit: int = 20):
+    """Autocomplete positions (Turkish case and diacritic insensitive)"""
+    limit = clamp_limit(limit, AUTOCOMPLETE_MAX_LIMIT)
+    if len(q.strip()) < 2:
+        return REFERENCE_DATA["positions"][:limit]  # First entries if no query
+    return POSITION_AUTOCOMPLETE.search(q, limit)
 
 @api_router.get("/provinces")
-async def get_provinces():
+async def get_provinces(request: Request):
     """Return Turkish provinces from constants"""
-    return PROVINCES
+    return PROVINCES_JSON.response(request)
 
 @api_router.get("/districts/{province}")
-async def get_districts(province: str):
+async def get_districts(province: str, request: Request):
     """Return districts for a given province"""
-    from constants import DISTRICTS
-    return DISTRICTS.get(province, [])
+    return DISTRICTS_JSON.get(province, EMPTY_LIST_JSON).response(request)
+
+@api_router.get("/districts/{province}/search")
+async def search_districts(province: str, q: str = "", limit: int = 20):
+    """Autocomplete districts of a province"""
+    index = DISTRICT_AUTOCOMPLETE.get(province)
+    if index is None:
+        return []
+    return index.search(q, clamp_limit(limit, AUTOCOMPLETE_MAX_LIMIT))
 
 @api_router.get("/faq")
-async def get_faq():
+async def get_faq(request: Request):
     """Return FAQ data from constants"""
-    return FAQ_DATA
+    return FAQ_JSON.response(request)
 
 # ============= SUPPORT TICKETS / FEEDBACK =============
 
@@ -2334,12 +4285,10 @@ async def delete_support_ticket(ticket_id: str, current_user: dict = Depends(get
 
 # Admin endpoints for support tickets
 @api_router.get("/admin/support-tickets")
-async def get_all_support_tickets(admin = Depends(verify_admin)):
+async def get_all_support_tickets(response: Response, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None, admin = Depends(verify_admin)):
     """Get all support tickets (admin only)"""
-    tickets = await db.support_tickets.find(
-        {},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(500)
+    tickets, next_cursor = await paginate(db.support_tickets, {}, {"_id": 0}, clamp_limit(limit, ADMIN_PAGE_SIZE), cursor)
+    set_next_cursor(response, next_cursor)
     
     return tickets
 
@@ -2408,6 +4357,157 @@ async def admin_delete_ticket(ticket_id: str, admin = Depends(verify_admin)):
     
     return {"message": "Destek talebi silindi"}
 
+# ============= DATABASE INDEXES =============
+# Declarative index registry: collection -> list of (keys, options).
+# Applied idempotently at startup and from the CLI (`python server.py indexes apply|report`).
+INDEXES: Dict[str, List[tuple]] = {
+    "users": [
+        ([("id", 1)], {"unique": True}),
+        ([("email", 1)], {"unique": True}),
+        ([("email_search", 1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("blocked", 1), ("created_at", -1), ("id", -1)], {}),
+    ],
+    "profiles": [
+        ([("id", 1)], {"unique": True}),
+        ([("user_id", 1)], {"unique": True}),
+    ],
+    "verifications": [
+        ([("id", 1)], {"unique": True}),
+    ],
+    "password_resets": [
+        ([("id", 1)], {"unique": True}),
+    ],
+    "listings": [
+        ([("id", 1)], {"unique": True}),
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("status", 1), ("search_grams", 1)], {}),
+        ([("user_id", 1), ("status", 1)], {}),
+    ],
+    "invitations": [
+        ([("id", 1)], {"unique": True}),
+        ([("sender_id", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("receiver_id", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("sender_id", 1), ("status", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("receiver_id", 1), ("status", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("listing_id", 1), ("sender_id", 1)], {}),
+    ],
+    "conversations": [
+        ([("id", 1)], {"unique": True}),
+        ([("participants", 1), ("last_activity_at", -1), ("id", -1)], {}),
+    ],
+    "messages": [
+        ([("id", 1)], {"unique": True}),
+        ([("conversation_id", 1), ("created_at", 1), ("id", 1)], {}),
+        ([("sender_id", 1)], {}),
+    ],
+    "notifications": [
+        ([("id", 1)], {"unique": True}),
+        ([("user_id", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("type", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("type", 1), ("user_id", 1), ("created_at", -1), ("id", -1)], {}),
+        # At most one unread coalesced chat notification per conversation and recipient
+        ([("user_id", 1), ("conversation_id", 1)], {
+            "unique": True,
+            "partialFilterExpression": {"type": "message", "read": False, "conversation_id": {"$exists": True}}
+        }),
+    ],
+    "ws_presence": [
+        ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+        ([("user_id", 1), ("conversation_id", 1)], {}),
+    ],
+    "blocks": [
+        ([("blocker_id", 1), ("blocked_id", 1)], {"unique": True}),
+        ([("blocked_id", 1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+    ],
+    "deletion_requests": [
+        ([("id", 1)], {"unique": True}),
+        ([("listing_id", 1), ("status", 1)], {}),
+        ([("user_id", 1), ("created_at", -1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+    ],
+    "profile_update_requests": [
+        ([("id", 1)], {"unique": True}),
+        ([("user_id", 1), ("status", 1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+    ],
+    "account_deletion_requests": [
+        ([("id", 1)], {"unique": True}),
+        ([("user_id", 1), ("status", 1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+    ],
+    "admins": [
+        ([("id", 1)], {"unique": True}),
+        ([("username", 1)], {"unique": True}),
+    ],
+    "support_tickets": [
+        ([("id", 1)], {"unique": True}),
+        ([("user_id", 1), ("created_at", -1)], {}),
+        ([("created_at", -1), ("id", -1)], {}),
+    ],
+    "broadcasts": [
+        ([("id", 1)], {"unique": True}),
+        ([("created_at", -1), ("id", -1)], {}),
+    ],
+    "broadcast_receipts": [
+        ([("user_id", 1), ("broadcast_id", 1)], {"unique": True}),
+        ([("broadcast_id", 1)], {}),
+    ],
+    "swap_cycles": [
+        ([("role", 1)], {}),
+        ([("run_id", 1)], {}),
+        ([("listing_ids", 1)], {}),
+        ([("user_ids", 1)], {}),
+    ],
+    "swap_cycle_roles": [
+        ([("role", 1)], {"unique": True}),
+    ],
+}
+
+def index_name(keys: List[tuple]) -> str:
+    """Same naming scheme MongoDB uses by default (e.g. status_1_created_at_-1)"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create every declared index. Existing identical indexes are a no-op;
+    conflicts (e.g. duplicates blocking a unique index) are logged, not raised."""
+    created: Dict[str, List[str]] = defaultdict(list)
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            name = index_name(keys)
+            try:
+                await db[collection].create_index(keys, name=name, **options)
+                created[collection].append(name)
+            except Exception as e:
+                logger.error(f"Index {collection}.{name} could not be created: {e}")
+    return dict(created)
+
+async def index_report() -> Dict[str, Dict[str, list]]:
+    """Diff the declared indexes against the live database"""
+    report = {}
+    for collection, specs in INDEXES.items():
+        live = {}
+        async for index in db[collection].list_indexes():
+            if index["name"] != "_id_":
+                live[index["name"]] = (list(index["key"].items()), bool(index.get("unique", False)))
+        declared = {index_name(keys): (list(keys), bool(options.get("unique", False))) for keys, options in specs}
+        report[collection] = {
+            "missing": sorted(name for name in declared if name not in live),
+            "extra": sorted(name for name in live if name not in declared),
+            "mismatched": sorted(
+                name for name in declared
+                if name in live and (
+                    [(k, int(v)) for k, v in live[name][0]] != declared[name][0] or live[name][1] != declared[name][1]
+                )
+            ),
+        }
+    return report
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -2420,6 +4520,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 logging.basicConfig(
@@ -2430,46 +4531,57 @@ logger = logging.getLogger(__name__)
 
 # ============= WEBSOCKET ENDPOINT =============
 @app.websocket("/ws/{token}")
-async def websocket_endpoint(websocket: WebSocket, token: str):
-    """WebSocket endpoint for real-time messaging"""
+async def websocket_endpoint(websocket: WebSocket, token: str, last_seq: Optional[int] = None, epoch: Optional[str] = None):
+    """WebSocket endpoint for real-time messaging (?last_seq=&epoch= resumes a session)"""
     try:
         # Verify token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            await websocket.close(code=4001)
-            return
-    except JWTError:
-        await websocket.close(code=4001)
+        user_id = (await get_user_for_token(payload))["id"]
+    except (JWTError, HTTPException):
+        await ws_manager.refuse(websocket, WS_CLOSE_UNAUTHORIZED)
         return
     
-    await ws_manager.connect(websocket, user_id)
+    session = await ws_manager.connect(websocket, user_id, last_seq, epoch)
+    if session is None:
+        return
     
     try:
         while True:
             data = await websocket.receive_json()
+            session.last_seen = time.monotonic()
             
             # Handle different message types
-            if data.get("type") == "message":
+            if data.get("type") == "pong":
+                continue
+            
+            elif data.get("type") == "focus":
+                # Client opened (or with null, left) a conversation
+                await ws_manager.set_focus(websocket, data.get("conversation_id"))
+            
+            elif data.get("type") == "message":
                 conversation_id = data.get("conversation_id")
                 content = data.get("content")
                 
                 if not conversation_id or not content:
                     continue
                 
-                # Get conversation
-                conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0})
-                if not conversation or user_id not in conversation["participants"]:
+                # Token still valid (password change, deletion); served from user_cache
+                try:
+                    await get_user_for_token(payload)
+                except HTTPException:
+                    await ws_manager.release(websocket, user_id)
+                    await websocket.close(code=WS_CLOSE_UNAUTHORIZED)
+                    return
+                
+                # Membership and block state come from the session cache
+                participants = await session.conversation_participants(conversation_id)
+                if participants is None:
                     continue
                 
                 # Check if blocked
-                other_user_id = [p for p in conversation["participants"] if p != user_id][0]
-                block = await db.blocks.find_one({
-                    "blocker_id": other_user_id,
-                    "blocked_id": user_id
-                })
-                if block:
-                    await websocket.send_json({
+                other_user_id = [p for p in participants if p != user_id][0]
+                if await session.is_blocked_by(other_user_id):
+                    ws_manager.enqueue(session, {
                         "type": "error",
                         "message": "Bu kullanıcıya mesaj gönderemezsiniz."
                     })
@@ -2484,28 +4596,23 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                     "read": False,
                     "created_at": datetime.now(timezone.utc).isoformat()
                 }
-                await db.messages.insert_one(message)
+                await write_behind.insert("messages", message)
+                platform_counters.add(total_messages=1)
                 
-                # Update conversation last message
-                await db.conversations.update_one(
-                    {"id": conversation_id},
-                    {"$set": {
-                        "last_message": {
-                            "content": content[:50] + "..." if len(content) > 50 else content,
-                            "sender_id": user_id,
-                            "created_at": message["created_at"],
-                            "read": False
-                        }
-                    }}
-                )
+                # Update conversation summary
+                await record_conversation_message(conversation_id, other_user_id, message)
+                
+                await ws_manager.set_focus(websocket, conversation_id)
+                typing_throttle.clear(conversation_id, user_id)
+                await notify_new_message(other_user_id, conversation_id)
                 
                 # Get sender profile
-                sender_profile = await db.profiles.find_one({"user_id": user_id}, {"_id": 0})
+                sender_profile = await session.sender_profile()
                 
                 # Broadcast to all participants
                 await ws_manager.broadcast_to_conversation(
                     conversation_id,
-                    conversation["participants"],
+                    participants,
                     {
                         "type": "new_message",
                         "conversation_id": conversation_id,
@@ -2518,38 +4625,115 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
             
             elif data.get("type") == "typing":
                 conversation_id = data.get("conversation_id")
-                conversation = await db.conversations.find_one({"id": conversation_id}, {"_id": 0})
-                if conversation and user_id in conversation["participants"]:
-                    other_user_id = [p for p in conversation["participants"] if p != user_id][0]
-                    await ws_manager.send_to_user(other_user_id, {
-                        "type": "typing",
-                        "conversation_id": conversation_id,
-                        "user_id": user_id
-                    })
+                participants = await session.conversation_participants(conversation_id) if conversation_id else None
+                if participants:
+                    await ws_manager.set_focus(websocket, conversation_id)
+                    other_user_id = [p for p in participants if p != user_id][0]
+                    await typing_throttle.typing(conversation_id, user_id, other_user_id)
             
             elif data.get("type") == "read":
                 conversation_id = data.get("conversation_id")
-                # Mark messages as read
-                await db.messages.update_many(
-                    {
-                        "conversation_id": conversation_id,
-                        "sender_id": {"$ne": user_id},
-                        "read": False
-                    },
+                if not conversation_id or await session.conversation_participants(conversation_id) is None:
+                    continue
+                # Mark the messages up to the last one the client has shown as read
+                await mark_conversation_read(conversation_id, user_id, data.get("message_id"))
+                # The coalesced "Yeni Mesaj" notification is read as well
+                await db.notifications.update_many(
+                    {"user_id": user_id, "conversation_id": conversation_id, "type": "message", "read": False},
                     {"$set": {"read": True}}
                 )
-                # Update conversation last message read status
-                await db.conversations.update_one(
-                    {"id": conversation_id, "last_message.sender_id": {"$ne": user_id}},
-                    {"$set": {"last_message.read": True}}
-                )
+                await ws_manager.set_focus(websocket, conversation_id)
                 
     except WebSocketDisconnect:
-        ws_manager.disconnect(websocket, user_id)
+        await ws_manager.release(websocket, user_id)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        ws_manager.disconnect(websocket, user_id)
+        await ws_manager.release(websocket, user_id)
+
+async def run_backfills():
+    """One-off data backfills; idempotent, so every worker may run them"""
+    try:
+        backfilled = await backfill_listing_search_fields()
+        if backfilled:
+            logger.info(f"Search fields added to {backfilled} listings")
+    except Exception as e:
+        logger.error(f"Listing search backfill failed: {e}")
+    try:
+        backfilled = await backfill_conversation_summaries()
+        if backfilled:
+            logger.info(f"Summaries added to {backfilled} conversations")
+    except Exception as e:
+        logger.error(f"Conversation summary backfill failed: {e}")
+    try:
+        backfilled = await backfill_user_email_search()
+        if backfilled:
+            logger.info(f"Search emails added to {backfilled} users")
+    except Exception as e:
+        logger.error(f"User email search backfill failed: {e}")
+
+@app.on_event("startup")
+async def create_db_indexes():
+    if os.environ.get("AUTO_CREATE_INDEXES", "true").lower() == "true":
+        await ensure_indexes()
+    # In the background so a large backlog does not hold up startup; see also the backfill command
+    if os.environ.get("BACKFILL_ON_STARTUP", "true").lower() == "true":
+        asyncio.create_task(run_backfills())
+
+@app.on_event("startup")
+async def build_match_index():
+    try:
+        await match_index.rebuild()
+    except Exception as e:
+        logger.error(f"Match index build failed: {e}")
+    asyncio.create_task(match_index_refresh_loop())
+    if os.environ.get("SWAP_CYCLE_JOB_ENABLED", "true").lower() == "true":
+        asyncio.create_task(swap_cycle_loop())
+
+@app.on_event("startup")
+async def start_ws_backplane():
+    await ws_manager.start()
+    await write_behind.start()
+    await platform_counters.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await ws_manager.stop()
+    await write_behind.stop()
+    await platform_counters.stop()
     client.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Becayiş maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    indexes_parser = subparsers.add_parser("indexes", help="Apply or report the declared MongoDB indexes")
+    indexes_parser.add_argument("action", choices=["apply", "report"])
+    cycles_parser = subparsers.add_parser("cycles", help="Recompute multi-party swap chains")
+    cycles_parser.add_argument("--force", action="store_true", help="Recompute every role, not only changed ones")
+    subparsers.add_parser("migrate-broadcasts", help="Convert per-user admin broadcast notifications into broadcasts")
+    subparsers.add_parser("reconcile-counters", help="Recount the platform counters shown in admin stats")
+    backfill_parser = subparsers.add_parser("backfill", help="Fill fields missing on documents written by older versions")
+    backfill_parser.add_argument("target", choices=["search", "conversations", "users"])
+    args = parser.parse_args()
+
+    if args.command == "indexes":
+        if args.action == "apply":
+            result = asyncio.run(ensure_indexes())
+        else:
+            result = asyncio.run(index_report())
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "cycles":
+        result = asyncio.run(recompute_swap_cycles(force=args.force))
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "migrate-broadcasts":
+        print(f"{asyncio.run(migrate_legacy_broadcasts())} broadcasts migrated")
+    elif args.command == "reconcile-counters":
+        print(json.dumps(asyncio.run(platform_counters.reconcile()), indent=2, ensure_ascii=False))
+    elif args.command == "backfill":
+        if args.target == "search":
+            print(f"Search fields added to {asyncio.run(backfill_listing_search_fields())} listings")
+        elif args.target == "conversations":
+            print(f"Summaries added to {asyncio.run(backfill_conversation_summaries())} conversations")
+        else:
+            print(f"Search emails added to {asyncio.run(backfill_user_email_search())} users")
@@ -84,7 +84,7 @@ export const Navbar = () => {
     try {
       const [notificationsRes, invitationsRes, conversationsRes] = await Promise.all([
         api.get('/notifications'),
-        api.get('/invitations'),
+        api.get('/invitations', { params: { status: 'pending', box: 'received' } }),
         api.get('/conversations')
       ]);
 
@@ -94,10 +94,8 @@ export const Navbar = () => {
       // Count pending received invitations
       const pendingInvitations = invitationsRes.data.received?.filter(i => i.status === 'pending').length || 0;
       
-      // Count unread messages (conversations with unread last message)
-      const unreadMessages = conversationsRes.data.filter(c => 
-        c.last_message && !c.last_message.read && c.last_message.sender_id !== user.id
-      ).length;
+      // Count unread messages (conversations with unread messages for this user)
+      const unreadMessages = conversationsRes.data.filter(c => c.unread_count > 0).length;
 
       const total = unreadNotifications + pendingInvitations + unreadMessages;
       setUnreadCount(total);
@@ -0,0 +1,23 @@
+import api from './api';
+
+// Provinces, districts, institutions, positions and FAQ come from a single
+// /bootstrap payload. The browser revalidates it with its ETag, so it is only
+// downloaded again after a release; within a page load it is fetched once.
+let pending = null;
+
+export const loadReferenceData = () => {
+  if (!pending) {
+    pending = api.get('/bootstrap')
+      .then(response => response.data)
+      .catch(error => {
+        pending = null;
+        throw error;
+      });
+  }
+  return pending;
+};
+
+export const loadDistricts = async (province) => {
+  const data = await loadReferenceData();
+  return data.districts[province] || [];
+};
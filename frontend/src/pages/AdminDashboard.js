@@ -33,6 +33,9 @@ const AdminDashboard = () => {
   const [admins, setAdmins] = useState([]);
   const [supportTickets, setSupportTickets] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Admin lists arrive one page at a time: endpoint -> cursor of its next page (X-Next-Cursor)
+  const [nextCursors, setNextCursors] = useState({});
+  const [loadingMore, setLoadingMore] = useState(null);
   const [activeTab, setActiveTab] = useState('users');
   
   // ============= STATE DEĞİŞİKLİKLERİ (useState'lerin olduğu yere ekle) =============
@@ -113,6 +116,35 @@ const AdminDashboard = () => {
     fetchData();
   }, [navigate]);
 
+  const nextCursorOf = (response) => response.headers?.['x-next-cursor'] || null;
+
+  // Append the next page of an admin list
+  const loadMore = async (path, setItems) => {
+    const cursor = nextCursors[path];
+    if (!cursor || loadingMore) return;
+    setLoadingMore(path);
+    try {
+      const response = await api.get(path, { params: { cursor } });
+      setItems(prev => {
+        const known = new Set(prev.map(item => item.id));
+        return [...prev, ...(response.data || []).filter(item => !known.has(item.id))];
+      });
+      setNextCursors(prev => ({ ...prev, [path]: nextCursorOf(response) }));
+    } catch (error) {
+      toast.error('Kayıtlar yüklenemedi');
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
+  const renderLoadMore = (path, setItems) => nextCursors[path] && (
+    <div className="flex justify-center mt-4">
+      <Button variant="outline" onClick={() => loadMore(path, setItems)} disabled={loadingMore === path} data-testid={`admin-load-more-${path.split('/').pop()}`}>
+        {loadingMore === path ? 'Yükleniyor...' : 'Daha fazla yükle'}
+      </Button>
+    </div>
+  );
+
   const fetchData = useCallback(async () => {
     try {
       setLoading(true);
@@ -149,6 +181,16 @@ const AdminDashboard = () => {
       setAdminUserMessages(userMessagesRes.data || []);
       setSupportTickets(ticketsRes.data || []);
       setProfileUpdateRequests(profileUpdateReqRes.data || []);  // YENİ
+      setNextCursors({
+        '/admin/users': nextCursorOf(usersRes),
+        '/admin/listings': nextCursorOf(listingsRes),
+        '/admin/reports': nextCursorOf(reportsRes),
+        '/admin/deletion-requests': nextCursorOf(deletionReqRes),
+        '/admin/account-deletion-requests': nextCursorOf(accountDeletionReqRes),
+        '/admin/pending-listings': nextCursorOf(pendingListingsRes),
+        '/admin/support-tickets': nextCursorOf(ticketsRes),
+        '/admin/profile-update-requests': nextCursorOf(profileUpdateReqRes),
+      });
     } catch (error) {
       toast.error('Veriler yüklenirken hata oluştu');
       if (error.response?.status === 403) {
@@ -965,6 +1007,7 @@ const getIncomingNotifications = () => {
                 ))}
               </div>
             )} 
+              {renderLoadMore('/admin/users', setUsers)}
             </Card>
           </TabsContent>
 
@@ -1010,6 +1053,7 @@ const getIncomingNotifications = () => {
                 ))}
               </div>
             )}  
+              {renderLoadMore('/admin/listings', setListings)}
             </Card>
           </TabsContent>
 
@@ -1084,6 +1128,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/pending-listings', setPendingListings)}
             </Card>
           </TabsContent>
 
@@ -1170,6 +1215,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/deletion-requests', setDeletionRequests)}
             </Card>
           </TabsContent>
 
@@ -1276,6 +1322,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/support-tickets', setSupportTickets)}
             </Card>
           </TabsContent>
 
@@ -1311,6 +1358,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/reports', setReports)}
             </Card>
           </TabsContent>
 
@@ -1444,6 +1492,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/profile-update-requests', setProfileUpdateRequests)}
             </Card>
           </TabsContent>
           
@@ -1534,6 +1583,7 @@ const getIncomingNotifications = () => {
                   ))}
                 </div>
               )}
+              {renderLoadMore('/admin/account-deletion-requests', setAccountDeletionRequests)}
             </Card>
           </TabsContent>
 
@@ -15,6 +15,12 @@ import {
   DropdownMenuTrigger,
 } from '../components/ui/dropdown-menu';
 
+// Messages fetched on open and per "load older" click
+const MESSAGE_PAGE_SIZE = 50;
+// WebSocket reconnect delay, doubled up to the max while the server is full
+const RECONNECT_BASE_MS = 3000;
+const RECONNECT_MAX_MS = 60000;
+
 const ChatPage = () => {
   const { conversationId } = useParams();
   const navigate = useNavigate();
@@ -23,16 +29,56 @@ const ChatPage = () => {
   const [participants, setParticipants] = useState([]);
   const [newMessage, setNewMessage] = useState('');
   const [loading, setLoading] = useState(true);
-  const [isTyping, setIsTyping] = useState(false);
   const [otherUserTyping, setOtherUserTyping] = useState(false);
+  // Cursor for the next page of older history (null when everything is loaded)
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
+  const messagesContainerRef = useRef(null);
   const wsRef = useRef(null);
-  const typingTimeoutRef = useRef(null);
+  const lastTypingSentRef = useRef(0);
+  // Resume state: last sequenced frame seen and the server epoch it belongs to
+  const lastSeqRef = useRef(null);
+  const epochRef = useRef(null);
+  // Sequenced frames can arrive out of order (seqs are allocated before delivery), so dedupe on exact seqs
+  const seenSeqsRef = useRef(new Set());
+  const [reloadKey, setReloadKey] = useState(0);
+  const otherTypingTimeoutRef = useRef(null);
+  const messagesRef = useRef([]);
 
   const scrollToBottom = useCallback(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, []);
 
+  useEffect(() => {
+    messagesRef.current = messages;
+  }, [messages]);
+
+  // Fetch only the messages newer than the last one shown
+  const syncNewMessages = useCallback(async () => {
+    const last = messagesRef.current[messagesRef.current.length - 1];
+    if (!last) {
+      setReloadKey(key => key + 1);
+      return;
+    }
+    try {
+      const response = await api.get(`/conversations/${conversationId}/messages`, { params: { after: last.id } });
+      setMessages(prev => {
+        const known = new Set(prev.map(m => m.id));
+        const fresh = response.data.messages.filter(m => !known.has(m.id));
+        return fresh.length ? [...prev, ...fresh] : prev;
+      });
+    } catch (error) {
+      console.error('Failed to sync messages:', error);
+    }
+  }, [conversationId]);
+
+  // Catch up when the tab regains focus
+  useEffect(() => {
+    window.addEventListener('focus', syncNewMessages);
+    return () => window.removeEventListener('focus', syncNewMessages);
+  }, [syncNewMessages]);
+
   // Connect to WebSocket
   useEffect(() => {
     const token = localStorage.getItem('token');
@@ -41,33 +87,80 @@ const ChatPage = () => {
     // Determine WebSocket URL
     const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const wsHost = process.env.REACT_APP_BACKEND_URL?.replace(/^https?:\/\//, '').replace(/\/api$/, '') || window.location.host;
-    const wsUrl = `${wsProtocol}//${wsHost}/ws/${token}`;
+    const baseWsUrl = `${wsProtocol}//${wsHost}/ws/${token}`;
+    // Set by the cleanup below so the socket it closes is not reconnected
+    let closed = false;
+    let reconnectTimer = null;
+    // Doubles while the server answers 1013 (full), back to the base once a socket opens
+    let reconnectDelay = RECONNECT_BASE_MS;
 
     const connectWebSocket = () => {
       try {
+        // On reconnect the server replays only the frames we missed
+        const wsUrl = lastSeqRef.current !== null
+          ? `${baseWsUrl}?last_seq=${lastSeqRef.current}&epoch=${encodeURIComponent(epochRef.current)}`
+          : baseWsUrl;
         wsRef.current = new WebSocket(wsUrl);
+        let sessionLatestSeq = null;
 
         wsRef.current.onopen = () => {
           console.log('WebSocket connected');
+          reconnectDelay = RECONNECT_BASE_MS;
+          // Tell the server which conversation is open so it skips chat notifications for it
+          wsRef.current.send(JSON.stringify({
+            type: 'focus',
+            conversation_id: conversationId
+          }));
         };
 
         wsRef.current.onmessage = (event) => {
           const data = JSON.parse(event.data);
           
-          if (data.type === 'new_message' && data.conversation_id === conversationId) {
-            setMessages(prev => [...prev, data.message]);
+          if (data.seq !== undefined) {
+            // Skip frames already seen (replay can overlap live delivery)
+            const seen = seenSeqsRef.current;
+            if (seen.has(data.seq)) return;
+            seen.add(data.seq);
+            if (seen.size > 500) seen.delete(seen.values().next().value);
+            lastSeqRef.current = Math.max(lastSeqRef.current ?? 0, data.seq);
+          }
+          
+          if (data.type === 'session') {
+            if (epochRef.current !== data.epoch) seenSeqsRef.current.clear();
+            epochRef.current = data.epoch;
+            sessionLatestSeq = data.latest_seq;
+            if (lastSeqRef.current === null) {
+              lastSeqRef.current = data.latest_seq;
+            }
+          } else if (data.type === 'resync') {
+            // Missed frames are no longer buffered; fetch the delta over REST instead
+            lastSeqRef.current = sessionLatestSeq;
+            syncNewMessages();
+          } else if (data.type === 'ping') {
+            // Heartbeat: the server reaps sockets that stop answering
+            wsRef.current.send(JSON.stringify({ type: 'pong' }));
+          } else if (data.type === 'new_message' && data.conversation_id === conversationId) {
+            setMessages(prev => prev.some(m => m.id === data.message.id) ? prev : [...prev, data.message]);
+            setOtherUserTyping(false);
             scrollToBottom();
             
             // Mark as read
             if (wsRef.current?.readyState === WebSocket.OPEN) {
               wsRef.current.send(JSON.stringify({
                 type: 'read',
-                conversation_id: conversationId
+                conversation_id: conversationId,
+                message_id: data.message.id
               }));
             }
           } else if (data.type === 'typing' && data.conversation_id === conversationId) {
+            // Server forwards typing at most every few seconds and follows up with typing_stopped;
+            // the timeout only covers a lost stop event
             setOtherUserTyping(true);
-            setTimeout(() => setOtherUserTyping(false), 2000);
+            clearTimeout(otherTypingTimeoutRef.current);
+            otherTypingTimeoutRef.current = setTimeout(() => setOtherUserTyping(false), 8000);
+          } else if (data.type === 'typing_stopped' && data.conversation_id === conversationId) {
+            clearTimeout(otherTypingTimeoutRef.current);
+            setOtherUserTyping(false);
           } else if (data.type === 'error') {
             toast.error(data.message);
           }
@@ -77,10 +170,14 @@ const ChatPage = () => {
           console.error('WebSocket error:', error);
         };
 
-        wsRef.current.onclose = () => {
+        wsRef.current.onclose = (event) => {
           console.log('WebSocket disconnected');
-          // Attempt to reconnect after 3 seconds
-          setTimeout(connectWebSocket, 3000);
+          // 4001: bad token, 1008: too many open tabs; retrying would not help
+          if (closed || [4001, 1008].includes(event.code)) return;
+          // 1013: server full for now, so back off; anything else (including 4000, evicted) retries soon
+          const delay = event.code === 1013 ? reconnectDelay : RECONNECT_BASE_MS;
+          if (event.code === 1013) reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_MS);
+          reconnectTimer = setTimeout(connectWebSocket, delay);
         };
       } catch (error) {
         console.error('Failed to connect WebSocket:', error);
@@ -90,11 +187,17 @@ const ChatPage = () => {
     connectWebSocket();
 
     return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
       if (wsRef.current) {
+        // Release the focus so chat notifications resume for this conversation
+        if (wsRef.current.readyState === WebSocket.OPEN) {
+          wsRef.current.send(JSON.stringify({ type: 'focus', conversation_id: null }));
+        }
         wsRef.current.close();
       }
     };
-  }, [conversationId, scrollToBottom]);
+  }, [conversationId, scrollToBottom, syncNewMessages]);
 
   // Fetch initial messages
   useEffect(() => {
@@ -102,9 +205,12 @@ const ChatPage = () => {
     
     const loadMessages = async () => {
       try {
-        const response = await api.get(`/conversations/${conversationId}/messages`);
+        const response = await api.get(`/conversations/${conversationId}/messages`, {
+          params: { limit: MESSAGE_PAGE_SIZE }
+        });
         if (isMounted) {
           setMessages(response.data.messages);
+          setOlderCursor(response.data.next_cursor);
           setParticipants(response.data.participants);
           setLoading(false);
           
@@ -112,7 +218,8 @@ const ChatPage = () => {
           if (wsRef.current?.readyState === WebSocket.OPEN) {
             wsRef.current.send(JSON.stringify({
               type: 'read',
-              conversation_id: conversationId
+              conversation_id: conversationId,
+              message_id: response.data.messages[response.data.messages.length - 1]?.id
             }));
           }
         }
@@ -129,11 +236,37 @@ const ChatPage = () => {
     return () => {
       isMounted = false;
     };
-  }, [conversationId, navigate]);
+  }, [conversationId, navigate, reloadKey]);
 
+  // Follow new messages only; prepending older history keeps the scroll position
+  const lastMessageId = messages[messages.length - 1]?.id;
   useEffect(() => {
     scrollToBottom();
-  }, [messages, scrollToBottom]);
+  }, [lastMessageId, scrollToBottom]);
+
+  const loadOlderMessages = async () => {
+    if (!olderCursor || loadingOlder) return;
+    setLoadingOlder(true);
+    const container = messagesContainerRef.current;
+    const previousHeight = container?.scrollHeight ?? 0;
+    try {
+      const response = await api.get(`/conversations/${conversationId}/messages`, {
+        params: { before: olderCursor, limit: MESSAGE_PAGE_SIZE }
+      });
+      setMessages(prev => {
+        const known = new Set(prev.map(m => m.id));
+        return [...response.data.messages.filter(m => !known.has(m.id)), ...prev];
+      });
+      setOlderCursor(response.data.next_cursor);
+      requestAnimationFrame(() => {
+        if (container) container.scrollTop += container.scrollHeight - previousHeight;
+      });
+    } catch (error) {
+      toast.error(getErrorMessage(error, 'Eski mesajlar yüklenemedi'));
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
 
   const handleSendMessage = async (e) => {
     e.preventDefault();
@@ -155,9 +288,8 @@ const ChatPage = () => {
           content: newMessage
         });
         setNewMessage('');
-        // Fetch updated messages
-        const messagesRes = await api.get(`/conversations/${conversationId}/messages`);
-        setMessages(messagesRes.data.messages);
+        // Fetch only what is newer than the last message shown (includes the one just sent)
+        await syncNewMessages();
       } catch (error) {
         toast.error(getErrorMessage(error, 'Mesaj gönderilemedi'));
       }
@@ -167,21 +299,15 @@ const ChatPage = () => {
   const handleTyping = (e) => {
     setNewMessage(e.target.value);
     
-    if (!isTyping && wsRef.current?.readyState === WebSocket.OPEN) {
-      setIsTyping(true);
+    // At most one typing frame every 2 seconds while the user keeps typing
+    const now = Date.now();
+    if (now - lastTypingSentRef.current >= 2000 && wsRef.current?.readyState === WebSocket.OPEN) {
+      lastTypingSentRef.current = now;
       wsRef.current.send(JSON.stringify({
         type: 'typing',
         conversation_id: conversationId
       }));
     }
-
-    // Reset typing indicator after 2 seconds of no input
-    if (typingTimeoutRef.current) {
-      clearTimeout(typingTimeoutRef.current);
-    }
-    typingTimeoutRef.current = setTimeout(() => {
-      setIsTyping(false);
-    }, 2000);
   };
 
   const handleBlockUser = async () => {
@@ -272,7 +398,14 @@ const ChatPage = () => {
 
         {/* Messages */}
         <Card className="p-6 h-[600px] flex flex-col">
-          <div className="flex-1 overflow-y-auto space-y-4 mb-4" data-testid="messages-container">
+          <div ref={messagesContainerRef} className="flex-1 overflow-y-auto space-y-4 mb-4" data-testid="messages-container">
+            {olderCursor && (
+              <div className="text-center">
+                <Button variant="ghost" size="sm" onClick={loadOlderMessages} disabled={loadingOlder} data-testid="load-older-messages">
+                  {loadingOlder ? 'Yükleniyor...' : 'Önceki mesajları yükle'}
+                </Button>
+              </div>
+            )}
             {messages.length === 0 ? (
               <div className="text-center text-muted-foreground py-12">
                 Henüz mesaj yok. Konuşmaya başlayın!
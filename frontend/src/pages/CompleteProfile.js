@@ -8,6 +8,7 @@ import { Card } from '../components/ui/card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { toast } from 'sonner';
 import api, { getErrorMessage } from '../lib/api';
+import { loadReferenceData } from '../lib/referenceData';
 import { useAuth } from '../contexts/AuthContext';
 import { User as UserIcon } from 'lucide-react';
 
@@ -35,8 +36,8 @@ const CompleteProfile = () => {
 
   const fetchProvinces = async () => {
     try {
-      const response = await api.get('/provinces');
-      setProvinces(response.data);
+      const { provinces } = await loadReferenceData();
+      setProvinces(provinces);
     } catch (error) {
       console.error('Failed to fetch provinces:', error);
     }
@@ -44,8 +45,8 @@ const CompleteProfile = () => {
 
   const fetchInstitutions = async () => {
     try {
-      const response = await api.get('/utility/institutions');
-      setInstitutions(response.data);
+      const { institutions } = await loadReferenceData();
+      setInstitutions(institutions);
     } catch (error) {
       console.error('Failed to fetch institutions:', error);
     }
@@ -53,8 +54,8 @@ const CompleteProfile = () => {
 
   const fetchPositions = async () => {
     try {
-      const response = await api.get('/utility/positions');
-      setPositions(response.data);
+      const { positions } = await loadReferenceData();
+      setPositions(positions);
     } catch (error) {
       console.error('Failed to fetch positions:', error);
     }
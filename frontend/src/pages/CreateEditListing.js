@@ -8,6 +8,7 @@ import { Card } from '../components/ui/card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { toast } from 'sonner';
 import api, { getErrorMessage } from '../lib/api';
+import { loadReferenceData, loadDistricts } from '../lib/referenceData';
 import { useAuth } from '../contexts/AuthContext';
 import { FileText } from 'lucide-react';
 
@@ -99,8 +100,8 @@ const CreateEditListing = () => {
 
   const fetchProvinces = async () => {
     try {
-      const response = await api.get('/provinces');
-      setProvinces(response.data);
+      const { provinces } = await loadReferenceData();
+      setProvinces(provinces);
     } catch (error) {
       console.error('Failed to fetch provinces:', error);
     }
@@ -108,8 +109,7 @@ const CreateEditListing = () => {
 
   const fetchDistricts = async (province) => {
     try {
-      const response = await api.get(`/districts/${encodeURIComponent(province)}`);
-      setDistricts(response.data);
+      setDistricts(await loadDistricts(province));
     } catch (error) {
       console.error('Failed to fetch districts:', error);
       setDistricts([]);
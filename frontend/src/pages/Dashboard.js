@@ -22,6 +22,7 @@ import {
   DialogFooter,
 } from '../components/ui/dialog';
 import api, { getErrorMessage } from '../lib/api';
+import { loadReferenceData, loadDistricts } from '../lib/referenceData';
 import { toast } from 'sonner';
 import { useAuth } from '../contexts/AuthContext';
 import { formatDate } from '../lib/utils';
@@ -177,14 +178,10 @@ const Dashboard = () => {
 
   const fetchDropdownData = async () => {
     try {
-      const [institutionsRes, positionsRes, provincesRes] = await Promise.all([
-        api.get('/institutions'),
-        api.get('/utility/positions'),
-        api.get('/provinces')
-      ]);
-      setInstitutions(institutionsRes.data);
-      setPositions(positionsRes.data);
-      setProvinces(provincesRes.data);
+      const { institutions, positions, provinces } = await loadReferenceData();
+      setInstitutions(institutions);
+      setPositions(positions);
+      setProvinces(provinces);
     } catch (error) {
       console.error('Failed to fetch dropdown data:', error);
     }
@@ -192,8 +189,7 @@ const Dashboard = () => {
 
   const fetchDistricts = async (province) => {
     try {
-      const response = await api.get(`/districts/${encodeURIComponent(province)}`);
-      setDistricts(response.data);
+      setDistricts(await loadDistricts(province));
     } catch (error) {
       console.error('Failed to fetch districts:', error);
       setDistricts([]);
@@ -311,10 +307,14 @@ const Dashboard = () => {
     
     setChangingPassword(true);
     try {
-      await api.post('/auth/change-password', {
+      const response = await api.post('/auth/change-password', {
         current_password: passwordData.current_password,
         new_password: passwordData.new_password
       });
+      // Older tokens are revoked after a password change
+      if (response.data?.access_token) {
+        localStorage.setItem('token', response.data.access_token);
+      }
       toast.success('Şifreniz başarıyla değiştirildi');
       setPasswordData({ current_password: '', new_password: '', confirm_password: '' });
     } catch (error) {
@@ -6,6 +6,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '.
 import { ListingCard } from '../components/ListingCard';
 import { MapPin, Users, ShieldCheck, MessageSquare, Search, X, Building2, Briefcase } from 'lucide-react';
 import api, { getErrorMessage } from '../lib/api';
+import { loadReferenceData } from '../lib/referenceData';
 import { toast } from 'sonner';
 import { useAuth } from '../contexts/AuthContext';
 
@@ -56,14 +57,13 @@ const Home = () => {
 
   const fetchInitialData = async () => {
     try {
-      const [provincesRes, positionsRes, topPositionsRes, topInstitutionsRes] = await Promise.all([
-        api.get('/provinces'),
-        api.get('/utility/positions'),
+      const [referenceData, topPositionsRes, topInstitutionsRes] = await Promise.all([
+        loadReferenceData(),
         api.get('/stats/top-positions'),
         api.get('/stats/top-institutions')
       ]);
-      setProvinces(provincesRes.data);
-      setPositions(positionsRes.data);
+      setProvinces(referenceData.provinces);
+      setPositions(referenceData.positions);
       setTopPositions(topPositionsRes.data);
       setTopInstitutions(topInstitutionsRes.data);
     } catch (error) {
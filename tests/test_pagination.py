@@ -0,0 +1,212 @@
+"""
+Keyset pagination tests
+- List endpoints return X-Next-Cursor while more pages exist
+- Following the cursor never repeats an item
+- Malformed cursors are rejected
+- Invitation boxes return only the requested list
+- Admin lists default to one page; user search ignores case
+"""
+
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+REGULAR_ADMIN_USERNAME = "becayis"
+REGULAR_ADMIN_PASSWORD = "1234"
+
+
+class TestListingPagination:
+    """Cursor pagination on GET /api/listings"""
+
+    def test_pages_do_not_overlap(self):
+        """Walking the cursor yields distinct listings in created_at order"""
+        seen = []
+        cursor = None
+        for _ in range(5):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{BASE_URL}/api/listings", params=params)
+            assert response.status_code == 200, f"Get listings failed: {response.text}"
+
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(listing["id"] for listing in page)
+
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        if len(seen) < 2:
+            pytest.skip("Not enough listings to test pagination")
+
+        assert len(seen) == len(set(seen)), "Pages must not repeat listings"
+        print(f"✓ Walked {len(seen)} listings without duplicates")
+
+    def test_last_page_has_no_cursor(self):
+        """A page smaller than the limit is the last one"""
+        response = requests.get(f"{BASE_URL}/api/listings", params={"limit": 100})
+        assert response.status_code == 200
+        if len(response.json()) < 100:
+            assert "X-Next-Cursor" not in response.headers
+        print("✓ Last page carries no cursor")
+
+    def test_invalid_cursor(self):
+        """Malformed cursor returns 400"""
+        response = requests.get(f"{BASE_URL}/api/listings", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        print("✓ Invalid cursor rejected")
+
+
+class TestInvitationBoxes:
+    """box=sent|received on GET /api/invitations"""
+
+    def register(self, tag):
+        """Register a verified user with a completed Zabıt Katibi profile"""
+        email = f"TEST_{tag}_{uuid.uuid4().hex[:8]}@adalet.gov.tr"
+        reg_response = requests.post(
+            f"{BASE_URL}/api/auth/register/step1",
+            json={"email": email, "password": "Test1234!", "first_name": "Test", "last_name": tag}
+        )
+        if reg_response.status_code != 200:
+            pytest.skip(f"Cannot create test user: {reg_response.text}")
+
+        verify_response = requests.post(
+            f"{BASE_URL}/api/auth/verify-email",
+            json={"verification_id": reg_response.json()["verification_id"],
+                  "code": reg_response.json()["email_code_mock"]}
+        )
+        if verify_response.status_code != 200:
+            pytest.skip(f"Cannot verify test user: {verify_response.text}")
+
+        token = verify_response.json()["access_token"]
+        user_id = verify_response.json()["user"]["id"]
+        requests.post(
+            f"{BASE_URL}/api/profile",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "user_id": user_id,
+                "display_name": f"Test {tag}",
+                "institution": "Adalet Bakanlığı",
+                "role": "Zabıt Katibi",
+                "current_province": "Ankara",
+                "current_district": "Çankaya"
+            }
+        )
+        return {"token": token, "user_id": user_id}
+
+    @pytest.fixture
+    def invitation(self):
+        """User 2 invites user 1 through user 1's approved listing"""
+        receiver, sender = self.register("box1"), self.register("box2")
+
+        admin_response = requests.post(
+            f"{BASE_URL}/api/admin/login",
+            params={"username": REGULAR_ADMIN_USERNAME, "password": REGULAR_ADMIN_PASSWORD}
+        )
+        if admin_response.status_code != 200:
+            pytest.skip(f"Admin login failed: {admin_response.text}")
+        admin_headers = {"Authorization": f"Bearer {admin_response.json()['access_token']}"}
+
+        listing_response = requests.post(
+            f"{BASE_URL}/api/listings",
+            headers={"Authorization": f"Bearer {receiver['token']}"},
+            json={
+                "title": "Ankara - İstanbul Becayiş",
+                "institution": "Adalet Bakanlığı",
+                "role": "Zabıt Katibi",
+                "current_province": "Ankara",
+                "current_district": "Çankaya",
+                "desired_province": "İstanbul",
+                "desired_district": "Kadıköy"
+            }
+        )
+        assert listing_response.status_code == 200, f"Listing creation failed: {listing_response.text}"
+        listing_id = listing_response.json()["listing"]["id"]
+        requests.post(f"{BASE_URL}/api/admin/listings/{listing_id}/approve", headers=admin_headers)
+
+        invitation_response = requests.post(
+            f"{BASE_URL}/api/invitations",
+            headers={"Authorization": f"Bearer {sender['token']}"},
+            json={"listing_id": listing_id}
+        )
+        assert invitation_response.status_code == 200, f"Invitation failed: {invitation_response.text}"
+
+        yield receiver, sender
+
+        for user in (receiver, sender):
+            requests.delete(f"{BASE_URL}/api/admin/users/{user['user_id']}", headers=admin_headers)
+
+    def test_received_box(self, invitation):
+        """box=received returns only the received list, with the pending invitation"""
+        receiver, sender = invitation
+        response = requests.get(
+            f"{BASE_URL}/api/invitations",
+            headers={"Authorization": f"Bearer {receiver['token']}"},
+            params={"box": "received", "status": "pending"}
+        )
+        assert response.status_code == 200, f"Get invitations failed: {response.text}"
+
+        data = response.json()
+        assert data["sent"] == []
+        assert [inv["sender_id"] for inv in data["received"]] == [sender["user_id"]]
+        print("✓ box=received returns the pending invitation")
+
+    def test_sent_box(self, invitation):
+        """box=sent returns only the sent list"""
+        receiver, sender = invitation
+        response = requests.get(
+            f"{BASE_URL}/api/invitations",
+            headers={"Authorization": f"Bearer {sender['token']}"},
+            params={"box": "sent"}
+        )
+        assert response.status_code == 200, f"Get invitations failed: {response.text}"
+
+        data = response.json()
+        assert data["received"] == []
+        assert [inv["receiver_id"] for inv in data["sent"]] == [receiver["user_id"]]
+        print("✓ box=sent returns the sent invitation")
+
+
+class TestAdminPagination:
+    """Admin lists default to one page and page on with X-Next-Cursor"""
+
+    @pytest.fixture
+    def admin_headers(self):
+        response = requests.post(
+            f"{BASE_URL}/api/admin/login",
+            params={"username": REGULAR_ADMIN_USERNAME, "password": REGULAR_ADMIN_PASSWORD}
+        )
+        if response.status_code != 200:
+            pytest.skip(f"Admin login failed: {response.text}")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_users_page_size_and_cursor(self, admin_headers):
+        """Default page holds at most 100 users and the next page does not repeat them"""
+        response = requests.get(f"{BASE_URL}/api/admin/users", headers=admin_headers)
+        assert response.status_code == 200, f"Get users failed: {response.text}"
+        first = response.json()
+        assert len(first) <= 100
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            pytest.skip("Not enough users to test admin pagination")
+        response = requests.get(f"{BASE_URL}/api/admin/users", headers=admin_headers, params={"cursor": cursor})
+        assert response.status_code == 200
+        assert not {u["id"] for u in first} & {u["id"] for u in response.json()}
+        print("✓ Admin users page on without overlap")
+
+    def test_user_search_ignores_case(self, admin_headers):
+        """q matches email prefixes whatever their case"""
+        users = requests.get(f"{BASE_URL}/api/admin/users", headers=admin_headers, params={"limit": 1}).json()
+        if not users:
+            pytest.skip("No users to search for")
+        email = users[0]["email"]
+
+        response = requests.get(f"{BASE_URL}/api/admin/users", headers=admin_headers, params={"q": email[:6].swapcase()})
+        assert response.status_code == 200
+        assert email in [u["email"] for u in response.json()]
+        print("✓ Admin user search is case-insensitive")
@@ -0,0 +1,79 @@
+"""
+Reference data bootstrap tests
+- GET /api/bootstrap returns every reference list with a content version
+- ETag revalidation answers 304
+- Versioned URLs are immutable
+"""
+
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestBootstrap:
+    """Versioned /api/bootstrap payload"""
+
+    def test_bootstrap_payload(self):
+        """Bootstrap carries all lists and matches the individual endpoints"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap")
+        assert response.status_code == 200, f"Get bootstrap failed: {response.text}"
+
+        data = response.json()
+        for key in ["version", "provinces", "districts", "institutions", "positions", "faq"]:
+            assert key in data, f"Missing {key}"
+        assert response.headers.get("ETag") == f'"{data["version"]}"'
+
+        provinces = requests.get(f"{BASE_URL}/api/provinces").json()
+        assert data["provinces"] == provinces
+        print(f"✓ Bootstrap version {data['version']}")
+
+    def test_etag_revalidation(self):
+        """Matching If-None-Match returns 304 without a body"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap")
+        etag = response.headers["ETag"]
+
+        response = requests.get(f"{BASE_URL}/api/bootstrap", headers={"If-None-Match": etag})
+        assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+        assert response.content == b""
+        print("✓ Bootstrap revalidates with 304")
+
+    def test_versioned_url_is_immutable(self):
+        """The current version URL is cacheable forever, stale ones are not"""
+        version = requests.get(f"{BASE_URL}/api/bootstrap").json()["version"]
+
+        response = requests.get(f"{BASE_URL}/api/bootstrap/{version}")
+        assert response.status_code == 200
+        assert "immutable" in response.headers.get("Cache-Control", "")
+
+        response = requests.get(f"{BASE_URL}/api/bootstrap/outdated")
+        assert response.status_code == 200
+        assert "immutable" not in response.headers.get("Cache-Control", "")
+        print("✓ Versioned bootstrap URL is immutable")
+
+
+class TestAutocomplete:
+    """Folded autocomplete for institutions and positions"""
+
+    def test_position_search_is_turkish_insensitive(self):
+        """Dotless/dotted I and diacritics do not affect matching"""
+        for q in ["öğretmen", "OGRETMEN", "Öğret"]:
+            response = requests.get(f"{BASE_URL}/api/positions/search", params={"q": q})
+            assert response.status_code == 200
+            assert "Öğretmen" in response.json(), f"Öğretmen not found for {q!r}"
+        print("✓ Position search folds Turkish characters")
+
+    def test_institution_search_ranks_prefix_first(self):
+        """Entries starting with the query come before other matches"""
+        response = requests.get(f"{BASE_URL}/api/institutions/search", params={"q": "İÇİŞLERİ"})
+        assert response.status_code == 200
+        results = response.json()
+        assert results and results[0] == "İçişleri Bakanlığı"
+        print("✓ Institution search ranks prefix matches first")
+
+    def test_search_limit(self):
+        """limit caps the number of suggestions"""
+        response = requests.get(f"{BASE_URL}/api/positions/search", params={"q": "me", "limit": 3})
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+        print("✓ Autocomplete honours limit")
@@ -0,0 +1,49 @@
+"""
+Swap matching tests
+- GET /api/listings/{id}/matches returns reciprocal partners only
+- GET /api/matches/my requires authentication
+"""
+
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestSwapMatching:
+    """Reciprocal match endpoint tests"""
+
+    def test_matches_for_unknown_listing(self):
+        """Unknown listing returns 404"""
+        response = requests.get(f"{BASE_URL}/api/listings/does-not-exist/matches")
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+        print("✓ Matches for unknown listing returns 404")
+
+    def test_matches_are_reciprocal(self):
+        """Every match has the same role and mirrored provinces"""
+        response = requests.get(f"{BASE_URL}/api/listings")
+        assert response.status_code == 200, f"Get listings failed: {response.text}"
+
+        listings = response.json()
+        if len(listings) == 0:
+            pytest.skip("No listings available to test")
+
+        for listing in listings[:10]:
+            response = requests.get(f"{BASE_URL}/api/listings/{listing['id']}/matches")
+            assert response.status_code == 200, f"Get matches failed: {response.text}"
+
+            for match in response.json():
+                assert match["user_id"] != listing["user_id"], "Own listings must not be matched"
+                assert match["role"].lower().strip() == listing["role"].lower().strip()
+                assert match["current_province"] == listing["desired_province"]
+                assert match["desired_province"] == listing["current_province"]
+                assert "user_initials" in match
+
+        print("✓ Matches are reciprocal")
+
+    def test_my_matches_requires_auth(self):
+        """/matches/my rejects anonymous requests"""
+        response = requests.get(f"{BASE_URL}/api/matches/my")
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
+        print("✓ /matches/my requires authentication")